@@ -1,18 +1,35 @@
 // ========== PDF MANAGEMENT ==========
 
 // Add a new PDF document
-QUERY addPDF(pdf_id: I32, title: String, summary: String, filename: String, upload_date: String, user_id: String) =>
+QUERY addPDF(pdf_id: I32, title: String, summary: String, filename: String, upload_date: String, user_id: String, analysis_version: String) =>
     pdf <- AddN<PDF>({
         pdf_id: pdf_id,
         title: title,
         summary: summary,
         filename: filename,
         upload_date: upload_date,
-        user_id: user_id
+        user_id: user_id,
+        analysis_version: analysis_version
     })
     RETURN pdf
 
 
+// Add many PDF documents in one call
+QUERY addPDFs(pdfs: [{pdf_id: I32, title: String, summary: String, filename: String, upload_date: String, user_id: String, analysis_version: String}]) =>
+    FOR {pdf_id, title, summary, filename, upload_date, user_id, analysis_version} IN pdfs {
+        AddN<PDF>({
+            pdf_id: pdf_id,
+            title: title,
+            summary: summary,
+            filename: filename,
+            upload_date: upload_date,
+            user_id: user_id,
+            analysis_version: analysis_version
+        })
+    }
+    RETURN "success"
+
+
 // Get all PDFs
 QUERY getAllPDFs() =>
     pdfs <- N<PDF>
@@ -22,7 +39,8 @@ QUERY getAllPDFs() =>
         summary,
         filename,
         upload_date,
-        user_id
+        user_id,
+        analysis_version
     }
 
 
@@ -35,35 +53,64 @@ QUERY getPDF(pdf_id: I32) =>
         summary,
         filename,
         upload_date,
-        user_id
+        user_id,
+        analysis_version
     }
 
 
-// Delete a PDF by ID
-QUERY deletePDF(pdf_id: I32) =>
-    DROP N<PDF>({pdf_id: pdf_id})
+// Replace the analysis results of a user's PDF in place
+QUERY updatePDFAnalysis(pdf_id: I32, user_id: String, title: String, summary: String, analysis_version: String) =>
+    pdf <- N<PDF>({pdf_id: pdf_id})::WHERE(_::{user_id}::EQ(user_id))::UPDATE({
+        title: title,
+        summary: summary,
+        analysis_version: analysis_version
+    })
+    RETURN pdf
+
+
+// Drop the relationships stored from a user's PDF (the ones judged when it was analysed)
+QUERY dropPDFOutEdges(pdf_id: I32, user_id: String) =>
+    DROP N<PDF>({pdf_id: pdf_id})::WHERE(_::{user_id}::EQ(user_id))::OutE<RelatedTo>
+    RETURN "success"
+
+
+// Delete a user's PDF by ID
+QUERY deletePDF(pdf_id: I32, user_id: String) =>
+    DROP N<PDF>({pdf_id: pdf_id})::WHERE(_::{user_id}::EQ(user_id))
     RETURN "success"
 
 
-// Get all PDFs (filter by user_id in application code)
+// Delete many of a user's PDFs by ID, together with their relationship edges
+// (pdf_id is allocated per user, so every lookup is scoped to the owner)
+QUERY deletePDFs(pdf_ids: [I32], user_id: String) =>
+    FOR pdf_id IN pdf_ids {
+        DROP N<PDF>({pdf_id: pdf_id})::WHERE(_::{user_id}::EQ(user_id))::OutE<RelatedTo>
+        DROP N<PDF>({pdf_id: pdf_id})::WHERE(_::{user_id}::EQ(user_id))::InE<RelatedTo>
+        DROP N<PDF>({pdf_id: pdf_id})::WHERE(_::{user_id}::EQ(user_id))
+    }
+    RETURN "success"
+
+
+// Get all PDFs uploaded by a user
 QUERY getPDFsByUser(user_id: String) =>
-    pdfs <- N<PDF>
+    pdfs <- N<PDF>::WHERE(_::{user_id}::EQ(user_id))
     RETURN pdfs::{
         pdf_id,
         title,
         summary,
         filename,
         upload_date,
-        user_id
+        user_id,
+        analysis_version
     }
 
 
 // ========== RELATIONSHIP MANAGEMENT ==========
 
-// Create a relationship between two PDFs
-QUERY relatePDFs(from_id: I32, to_id: I32, relationship_type: String, confidence: F64) =>
-    pdf1 <- N<PDF>({pdf_id: from_id})
-    pdf2 <- N<PDF>({pdf_id: to_id})
+// Create a relationship between two of a user's PDFs (stored once, from the newer PDF to the older one)
+QUERY relatePDFs(from_id: I32, to_id: I32, user_id: String, relationship_type: String, confidence: F64) =>
+    pdf1 <- N<PDF>({pdf_id: from_id})::WHERE(_::{user_id}::EQ(user_id))
+    pdf2 <- N<PDF>({pdf_id: to_id})::WHERE(_::{user_id}::EQ(user_id))
 
     AddE<RelatedTo>({relationship_type: relationship_type, confidence: confidence})::From(pdf1)::To(pdf2)
 
@@ -74,18 +121,35 @@ QUERY relatePDFs(from_id: I32, to_id: I32, relationship_type: String, confidence
     }
 
 
-// Get all PDFs related to a specific PDF (outgoing edges only)
+// Create many relationships in one call (each stored once, newer PDF to older,
+// between PDFs of the edge's user)
+QUERY relatePDFsBulk(edges: [{from_id: I32, to_id: I32, user_id: String, relationship_type: String, confidence: F64}]) =>
+    FOR {from_id, to_id, user_id, relationship_type, confidence} IN edges {
+        pdf1 <- N<PDF>({pdf_id: from_id})::WHERE(_::{user_id}::EQ(user_id))
+        pdf2 <- N<PDF>({pdf_id: to_id})::WHERE(_::{user_id}::EQ(user_id))
+        AddE<RelatedTo>({relationship_type: relationship_type, confidence: confidence})::From(pdf1)::To(pdf2)
+    }
+    RETURN "success"
+
+
+// Get all PDFs related to a specific PDF (both edge directions)
 QUERY getRelatedPDFs(pdf_id: I32) =>
     pdf <- N<PDF>({pdf_id: pdf_id})
 
-    // Get outgoing relationships
+    // Relationships this PDF was created with, and those created against it
     related <- pdf::Out<RelatedTo>
+    related_in <- pdf::In<RelatedTo>
 
     RETURN related::{
         pdf_id,
         title,
         summary,
         filename
+    }, related_in::{
+        pdf_id,
+        title,
+        summary,
+        filename
     }
 
 
@@ -93,11 +157,227 @@ QUERY getRelatedPDFs(pdf_id: I32) =>
 QUERY getPDFConnections(pdf_id: I32) =>
     pdf <- N<PDF>({pdf_id: pdf_id})
 
-    // Get outgoing relationships
-    related <- pdf::Out<RelatedTo>
+    // Relationships this PDF was created with, and those created against it
+    related <- pdf::OutE<RelatedTo>
+    related_in <- pdf::InE<RelatedTo>
 
     RETURN related::{
+        pdf_id: _::ToN::{pdf_id},
+        title: _::ToN::{title},
+        relationship_type,
+        confidence
+    }, related_in::{
+        pdf_id: _::FromN::{pdf_id},
+        title: _::FromN::{title},
+        relationship_type,
+        confidence
+    }
+
+
+// Get every relationship with its endpoint ids (used to build in-memory mirrors)
+QUERY getAllRelationships() =>
+    edges <- N<PDF>::OutE<RelatedTo>
+    RETURN edges::{
+        edge_id: ID,
+        user_id: _::FromN::{user_id},
+        from_id: _::FromN::{pdf_id},
+        to_id: _::ToN::{pdf_id},
+        relationship_type,
+        confidence
+    }
+
+
+// Get the relationships stored from a user's PDFs (the user's whole edge set)
+QUERY getUserRelationships(user_id: String) =>
+    edges <- N<PDF>::WHERE(_::{user_id}::EQ(user_id))::OutE<RelatedTo>
+    RETURN edges::{
+        from_id: _::FromN::{pdf_id},
+        to_id: _::ToN::{pdf_id},
+        relationship_type,
+        confidence
+    }
+
+// Delete a single relationship edge by its Helix ID
+QUERY dropRelationship(edge_id: ID) =>
+    DROP E<RelatedTo>(edge_id)
+    RETURN "success"
+
+
+// ========== TRAVERSALS ==========
+// Each query follows one edge direction for every hop; a path that goes
+// forward along one edge and backward along the next is not found.
+
+// Follow relationships of one type up to three hops out (top_k strongest edges per hop)
+QUERY traverseRelated(pdf_id: I32, user_id: String, relationship_type: String, min_confidence: F64, top_k: I64) =>
+    pdf <- N<PDF>({pdf_id: pdf_id})::WHERE(_::{user_id}::EQ(user_id))
+
+    e1 <- pdf::OutE<RelatedTo>::WHERE(AND(_::{relationship_type}::EQ(relationship_type), _::{confidence}::GTE(min_confidence)))::ORDER<Desc>(_::{confidence})::RANGE(0, top_k)
+    n1 <- e1::ToN
+    e2 <- n1::OutE<RelatedTo>::WHERE(AND(_::{relationship_type}::EQ(relationship_type), _::{confidence}::GTE(min_confidence)))::ORDER<Desc>(_::{confidence})::RANGE(0, top_k)
+    n2 <- e2::ToN
+    e3 <- n2::OutE<RelatedTo>::WHERE(AND(_::{relationship_type}::EQ(relationship_type), _::{confidence}::GTE(min_confidence)))::ORDER<Desc>(_::{confidence})::RANGE(0, top_k)
+    n3 <- e3::ToN
+
+    RETURN e1::{
+        from_id: _::FromN::{pdf_id},
+        to_id: _::ToN::{pdf_id},
+        relationship_type,
+        confidence
+    }, n1::{
         pdf_id,
         title,
-        summary
+        summary,
+        filename
+    }, e2::{
+        from_id: _::FromN::{pdf_id},
+        to_id: _::ToN::{pdf_id},
+        relationship_type,
+        confidence
+    }, n2::{
+        pdf_id,
+        title,
+        summary,
+        filename
+    }, e3::{
+        from_id: _::FromN::{pdf_id},
+        to_id: _::ToN::{pdf_id},
+        relationship_type,
+        confidence
+    }, n3::{
+        pdf_id,
+        title,
+        summary,
+        filename
+    }
+
+
+// Follow relationships of any type up to three hops out (top_k strongest edges per hop)
+QUERY traverseRelatedAny(pdf_id: I32, user_id: String, min_confidence: F64, top_k: I64) =>
+    pdf <- N<PDF>({pdf_id: pdf_id})::WHERE(_::{user_id}::EQ(user_id))
+
+    e1 <- pdf::OutE<RelatedTo>::WHERE(_::{confidence}::GTE(min_confidence))::ORDER<Desc>(_::{confidence})::RANGE(0, top_k)
+    n1 <- e1::ToN
+    e2 <- n1::OutE<RelatedTo>::WHERE(_::{confidence}::GTE(min_confidence))::ORDER<Desc>(_::{confidence})::RANGE(0, top_k)
+    n2 <- e2::ToN
+    e3 <- n2::OutE<RelatedTo>::WHERE(_::{confidence}::GTE(min_confidence))::ORDER<Desc>(_::{confidence})::RANGE(0, top_k)
+    n3 <- e3::ToN
+
+    RETURN e1::{
+        from_id: _::FromN::{pdf_id},
+        to_id: _::ToN::{pdf_id},
+        relationship_type,
+        confidence
+    }, n1::{
+        pdf_id,
+        title,
+        summary,
+        filename
+    }, e2::{
+        from_id: _::FromN::{pdf_id},
+        to_id: _::ToN::{pdf_id},
+        relationship_type,
+        confidence
+    }, n2::{
+        pdf_id,
+        title,
+        summary,
+        filename
+    }, e3::{
+        from_id: _::FromN::{pdf_id},
+        to_id: _::ToN::{pdf_id},
+        relationship_type,
+        confidence
+    }, n3::{
+        pdf_id,
+        title,
+        summary,
+        filename
+    }
+
+
+// Follow relationships of one type up to three hops in, against stored edge direction (top_k strongest edges per hop)
+QUERY traverseRelatedIn(pdf_id: I32, user_id: String, relationship_type: String, min_confidence: F64, top_k: I64) =>
+    pdf <- N<PDF>({pdf_id: pdf_id})::WHERE(_::{user_id}::EQ(user_id))
+
+    e1 <- pdf::InE<RelatedTo>::WHERE(AND(_::{relationship_type}::EQ(relationship_type), _::{confidence}::GTE(min_confidence)))::ORDER<Desc>(_::{confidence})::RANGE(0, top_k)
+    n1 <- e1::FromN
+    e2 <- n1::InE<RelatedTo>::WHERE(AND(_::{relationship_type}::EQ(relationship_type), _::{confidence}::GTE(min_confidence)))::ORDER<Desc>(_::{confidence})::RANGE(0, top_k)
+    n2 <- e2::FromN
+    e3 <- n2::InE<RelatedTo>::WHERE(AND(_::{relationship_type}::EQ(relationship_type), _::{confidence}::GTE(min_confidence)))::ORDER<Desc>(_::{confidence})::RANGE(0, top_k)
+    n3 <- e3::FromN
+
+    RETURN e1::{
+        from_id: _::FromN::{pdf_id},
+        to_id: _::ToN::{pdf_id},
+        relationship_type,
+        confidence
+    }, n1::{
+        pdf_id,
+        title,
+        summary,
+        filename
+    }, e2::{
+        from_id: _::FromN::{pdf_id},
+        to_id: _::ToN::{pdf_id},
+        relationship_type,
+        confidence
+    }, n2::{
+        pdf_id,
+        title,
+        summary,
+        filename
+    }, e3::{
+        from_id: _::FromN::{pdf_id},
+        to_id: _::ToN::{pdf_id},
+        relationship_type,
+        confidence
+    }, n3::{
+        pdf_id,
+        title,
+        summary,
+        filename
+    }
+
+
+// Follow relationships of any type up to three hops in, against stored edge direction (top_k strongest edges per hop)
+QUERY traverseRelatedAnyIn(pdf_id: I32, user_id: String, min_confidence: F64, top_k: I64) =>
+    pdf <- N<PDF>({pdf_id: pdf_id})::WHERE(_::{user_id}::EQ(user_id))
+
+    e1 <- pdf::InE<RelatedTo>::WHERE(_::{confidence}::GTE(min_confidence))::ORDER<Desc>(_::{confidence})::RANGE(0, top_k)
+    n1 <- e1::FromN
+    e2 <- n1::InE<RelatedTo>::WHERE(_::{confidence}::GTE(min_confidence))::ORDER<Desc>(_::{confidence})::RANGE(0, top_k)
+    n2 <- e2::FromN
+    e3 <- n2::InE<RelatedTo>::WHERE(_::{confidence}::GTE(min_confidence))::ORDER<Desc>(_::{confidence})::RANGE(0, top_k)
+    n3 <- e3::FromN
+
+    RETURN e1::{
+        from_id: _::FromN::{pdf_id},
+        to_id: _::ToN::{pdf_id},
+        relationship_type,
+        confidence
+    }, n1::{
+        pdf_id,
+        title,
+        summary,
+        filename
+    }, e2::{
+        from_id: _::FromN::{pdf_id},
+        to_id: _::ToN::{pdf_id},
+        relationship_type,
+        confidence
+    }, n2::{
+        pdf_id,
+        title,
+        summary,
+        filename
+    }, e3::{
+        from_id: _::FromN::{pdf_id},
+        to_id: _::ToN::{pdf_id},
+        relationship_type,
+        confidence
+    }, n3::{
+        pdf_id,
+        title,
+        summary,
+        filename
     }
@@ -2,15 +2,18 @@
 
 // PDF node - represents a processed PDF document
 N::PDF {
-    INDEX pdf_id: I32,      // Unique identifier for each PDF
+    INDEX pdf_id: I32,      // Allocated per user: unique only together with user_id
     user_id: String,        // User who uploaded the PDF
     title: String,
     summary: String,
     filename: String,
-    upload_date: String
+    upload_date: String,
+    analysis_version: String  // Model + prompt version that produced title/summary/edges
 }
 
 // Edge: PDF is related to another PDF
+// Stored once per relationship, From the newer PDF To the older one.
+// Symmetric types (similar_topic, contradicts) are traversed both ways.
 E::RelatedTo {
     From: PDF,
     To: PDF,
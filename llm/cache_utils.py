@@ -0,0 +1,110 @@
+"""
+In-Process Cache Module
+Memory-bounded LRU read-through cache for PDF lists and neighbour sets,
+with ETags for conditional requests
+"""
+
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Cache Configuration from environment variables
+PDF_CACHE_MAX_BYTES = int(os.getenv('PDF_CACHE_MAX_BYTES', 64 * 1024 * 1024))  # 64 MB default
+
+
+class LRUCache:
+    """
+    LRU cache bounded by the approximate serialized size of its values
+
+    Every invalidation bumps a generation counter. Readers capture the
+    generation before querying the database and pass it to set(), so a
+    result fetched before a concurrent write is never stored after it.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.generation = 0
+        self._entries: OrderedDict = OrderedDict()  # key -> (value, size, etag)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def etag(self, key: Hashable) -> Optional[str]:
+        entry = self._entries.get(key)
+        return entry[2] if entry else None
+
+    def set(self, key: Hashable, value: Any, generation: Optional[int] = None) -> None:
+        if generation is not None and generation != self.generation:
+            return
+
+        encoded = json.dumps(value, sort_keys=True, default=str).encode()
+        size = len(encoded)
+        if size > self.max_bytes:
+            return
+        etag = '"' + hashlib.sha1(encoded).hexdigest() + '"'
+
+        self._drop(key)
+        self._entries[key] = (value, size, etag)
+        self.current_bytes += size
+
+        while self.current_bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+
+    def invalidate(self, *keys: Hashable) -> None:
+        self.generation += 1
+        for key in keys:
+            self._drop(key)
+
+    def invalidate_where(self, predicate: Callable[[Hashable, Any], bool]) -> None:
+        self.generation += 1
+        for key in [k for k, entry in self._entries.items() if predicate(k, entry[0])]:
+            self._drop(key)
+
+    def _drop(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry[1]
+
+
+# Shared cache: ("pdfs", user_id or "*") -> PDF list, ("related", pdf_id) -> neighbour list
+pdf_cache = LRUCache(PDF_CACHE_MAX_BYTES)
+
+
+def pdfs_key(user_id: Optional[str]) -> tuple:
+    return ("pdfs", user_id or "*")
+
+
+def related_key(pdf_id: int) -> tuple:
+    return ("related", pdf_id)
+
+
+def invalidate_user_pdfs(user_id: str) -> None:
+    """Invalidate a user's PDF list (and the unfiltered list)"""
+    pdf_cache.invalidate(pdfs_key(user_id), pdfs_key(None))
+
+
+def invalidate_related(*pdf_ids: int) -> None:
+    """Invalidate the neighbour sets of the given PDFs"""
+    pdf_cache.invalidate(*[related_key(pdf_id) for pdf_id in pdf_ids])
+
+
+def invalidate_pdf(pdf_id: int, user_id: str) -> None:
+    """Invalidate everything that can mention a PDF (after it is deleted or re-analysed)"""
+    invalidate_user_pdfs(user_id)
+    pdf_cache.invalidate_where(
+        lambda key, value: key == related_key(pdf_id) or (
+            key[0] == "related" and any(pdf.get("pdf_id") == pdf_id for pdf in value)
+        )
+    )
@@ -0,0 +1,93 @@
+"""
+Connection Cache Module
+Persistent pair-level memo of connection analysis results, so unchanged
+(new, existing) document pairs are never sent to the LLM twice
+
+Pairs are keyed by content hashes of both documents' titles and summaries
+plus the analysis version, and "not related" verdicts are cached as well.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Connection cache Configuration from environment variables
+CONNECTION_CACHE_DB = os.getenv('CONNECTION_CACHE_DB', 'connection_cache.db')
+
+# One connection per thread: callers run in asyncio.to_thread
+_local = threading.local()
+
+
+def _get_connection() -> sqlite3.Connection:
+    """Per-thread connection (connections must not cross a fork or a thread)"""
+    if getattr(_local, "pid", None) != os.getpid():
+        connection = sqlite3.connect(CONNECTION_CACHE_DB, timeout=5, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS pairs (
+                new_hash TEXT NOT NULL,
+                existing_hash TEXT NOT NULL,
+                version TEXT NOT NULL,
+                relationship_type TEXT,
+                confidence REAL NOT NULL,
+                PRIMARY KEY (new_hash, existing_hash, version)
+            )
+        """)
+        _local.connection = connection
+        _local.pid = os.getpid()
+    return _local.connection
+
+
+def content_hash(pdf: dict) -> str:
+    """Hash of what the connection agent sees of a PDF"""
+    return hashlib.sha256(f"{pdf['title']}\n{pdf['summary']}".encode()).hexdigest()[:32]
+
+
+def get_pairs(new_hash: str, existing_hashes: List[str], version: str) -> Dict[str, Tuple[Optional[str], float]]:
+    """
+    Look up cached verdicts for a new PDF against existing PDFs
+
+    Returns:
+        dict: existing_hash -> (relationship_type, confidence) for cached
+            pairs; relationship_type is None for "not related"
+    """
+    results = {}
+    connection = _get_connection()
+    unique = list(dict.fromkeys(existing_hashes))
+    for start in range(0, len(unique), 500):  # stay under SQLite's bound-parameter limit
+        chunk = unique[start:start + 500]
+        rows = connection.execute(
+            f"SELECT existing_hash, relationship_type, confidence FROM pairs "
+            f"WHERE new_hash = ? AND version = ? AND existing_hash IN ({','.join('?' * len(chunk))})",
+            [new_hash, version, *chunk]
+        ).fetchall()
+        results.update({existing_hash: (relationship_type, confidence) for existing_hash, relationship_type, confidence in rows})
+    return results
+
+
+def store_pairs(rows: List[tuple], version: str) -> None:
+    """
+    Record verdicts
+
+    Args:
+        rows: (new_hash, existing_hash, relationship_type or None, confidence) tuples
+        version: Analysis version the verdicts were produced with
+    """
+    if not rows:
+        return
+    _get_connection().executemany(
+        "INSERT OR REPLACE INTO pairs (new_hash, existing_hash, version, relationship_type, confidence) VALUES (?, ?, ?, ?, ?)",
+        [(new_hash, existing_hash, version, relationship_type, confidence)
+         for new_hash, existing_hash, relationship_type, confidence in rows]
+    )
+
+
+def prune(version: str) -> None:
+    """Drop verdicts from other analysis versions (they can never be hit again)"""
+    _get_connection().execute("DELETE FROM pairs WHERE version != ?", (version,))
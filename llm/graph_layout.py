@@ -0,0 +1,204 @@
+"""
+Graph Layout Module
+Server-side community detection and 3D layout of each user's PDF graph,
+cached per user and updated incrementally as PDFs and edges are written
+"""
+
+import math
+import os
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Layout Configuration from environment variables
+LAYOUT_RADIUS = float(os.getenv('LAYOUT_RADIUS', 200.0))          # distance of cluster centres from the origin
+LAYOUT_CLUSTER_SPREAD = float(os.getenv('LAYOUT_CLUSTER_SPREAD', 18.0))  # cluster radius per cube root of its size
+LAYOUT_MAX_DRIFT = float(os.getenv('LAYOUT_MAX_DRIFT', 0.2))      # fraction of incremental changes before a full recompute
+LABEL_PROPAGATION_ITERATIONS = 20
+
+GOLDEN_ANGLE = math.pi * (3 - math.sqrt(5))
+
+
+def fibonacci_sphere(count: int) -> List[Tuple[float, float, float]]:
+    """Evenly spread unit vectors"""
+    if count == 1:
+        return [(0.0, 0.0, 0.0)]
+    points = []
+    for i in range(count):
+        y = 1 - 2 * (i + 0.5) / count
+        r = math.sqrt(1 - y * y)
+        theta = GOLDEN_ANGLE * i
+        points.append((math.cos(theta) * r, y, math.sin(theta) * r))
+    return points
+
+
+def label_propagation(pdf_ids: List[int], adjacency: Dict[int, Dict[int, float]]) -> Dict[int, int]:
+    """
+    Weighted label propagation
+
+    Every PDF starts in its own community and repeatedly adopts the label
+    with the highest total edge confidence among its neighbours (ties keep
+    the current label, otherwise the smallest label wins). Visiting PDFs in
+    pdf_id order keeps the result deterministic.
+    """
+    labels = {pdf_id: pdf_id for pdf_id in pdf_ids}
+    for _ in range(LABEL_PROPAGATION_ITERATIONS):
+        changed = False
+        for pdf_id in pdf_ids:
+            weights: Dict[int, float] = {}
+            for neighbour, confidence in adjacency.get(pdf_id, {}).items():
+                label = labels[neighbour]
+                weights[label] = weights.get(label, 0.0) + confidence
+            if not weights:
+                continue
+            best = max(weights.values())
+            if weights.get(labels[pdf_id]) == best:
+                continue
+            labels[pdf_id] = min(label for label, weight in weights.items() if weight == best)
+            changed = True
+        if not changed:
+            break
+    return labels
+
+
+class GraphLayout:
+    """
+    Cluster assignment and 3D coordinates for one user's graph
+
+    compute() lays out clusters on a sphere (largest first) and packs each
+    cluster's PDFs into a ball around its centre, best-connected PDFs in
+    the middle. Between full computations, new PDFs are placed at the
+    weighted centroid of their neighbours and join their strongest
+    neighbouring cluster; once the number of such changes exceeds
+    LAYOUT_MAX_DRIFT of the graph, the layout is marked stale.
+    """
+
+    def __init__(self):
+        self.positions: Dict[int, Tuple[float, float, float]] = {}
+        self.clusters: Dict[int, int] = {}
+        self.adjacency: Dict[int, Dict[int, float]] = {}
+        self.changes = 0
+        self.stale = False
+
+    def compute(self, pdf_ids: List[int], edges: List[dict]) -> None:
+        pdf_ids = sorted(set(pdf_ids))
+        adjacency: Dict[int, Dict[int, float]] = {pdf_id: {} for pdf_id in pdf_ids}
+        for edge in edges:
+            a, b = edge["from_id"], edge["to_id"]
+            if a in adjacency and b in adjacency and a != b:
+                weight = max(adjacency[a].get(b, 0.0), float(edge["confidence"]))
+                adjacency[a][b] = weight
+                adjacency[b][a] = weight
+
+        labels = label_propagation(pdf_ids, adjacency)
+
+        # Renumber communities by size (largest = cluster 0)
+        members: Dict[int, List[int]] = {}
+        for pdf_id in pdf_ids:
+            members.setdefault(labels[pdf_id], []).append(pdf_id)
+        ordered = sorted(members.values(), key=lambda group: (-len(group), group[0]))
+
+        positions = {}
+        clusters = {}
+        centres = fibonacci_sphere(len(ordered)) if ordered else []
+        for cluster, (group, centre) in enumerate(zip(ordered, centres)):
+            group.sort(key=lambda pdf_id: -sum(adjacency[pdf_id].values()))
+            radius = LAYOUT_CLUSTER_SPREAD * len(group) ** (1 / 3)
+            offsets = fibonacci_sphere(len(group))
+            for j, (pdf_id, offset) in enumerate(zip(group, offsets)):
+                depth = radius * ((j + 1) / len(group)) ** (1 / 3)
+                positions[pdf_id] = tuple(
+                    round(LAYOUT_RADIUS * c + depth * o, 2) for c, o in zip(centre, offset)
+                )
+                clusters[pdf_id] = cluster
+
+        self.positions = positions
+        self.clusters = clusters
+        self.adjacency = adjacency
+        self.changes = 0
+        self.stale = False
+
+    def _record_change(self) -> None:
+        self.changes += 1
+        if self.changes > max(5, LAYOUT_MAX_DRIFT * len(self.positions)):
+            self.stale = True
+
+    def add_node(self, pdf_id: int) -> None:
+        """Place a new PDF on its own, in a new cluster, until its edges arrive"""
+        if pdf_id in self.positions:
+            return
+        self.adjacency[pdf_id] = {}
+        self.clusters[pdf_id] = max(self.clusters.values(), default=-1) + 1
+        index = len(self.positions)
+        point = fibonacci_sphere(index + 2)[index]
+        self.positions[pdf_id] = tuple(round(LAYOUT_RADIUS * 1.2 * c, 2) for c in point)
+        self._record_change()
+
+    def add_edge(self, from_id: int, to_id: int, confidence: float) -> None:
+        """Pull the newer PDF (from_id) into the neighbourhood it was linked to"""
+        if from_id not in self.positions or to_id not in self.positions:
+            return
+        self.adjacency[from_id][to_id] = float(confidence)
+        self.adjacency[to_id][from_id] = float(confidence)
+
+        neighbours = self.adjacency[from_id]
+        total = sum(neighbours.values())
+        centroid = [sum(self.positions[n][axis] * w for n, w in neighbours.items()) / total for axis in range(3)]
+        # Offset slightly so the new PDF does not sit on top of a lone neighbour
+        offset = LAYOUT_CLUSTER_SPREAD / 2
+        self.positions[from_id] = tuple(round(c + offset * o, 2) for c, o in zip(centroid, fibonacci_sphere(3)[from_id % 3]))
+
+        weights: Dict[int, float] = {}
+        for neighbour, weight in neighbours.items():
+            weights[self.clusters[neighbour]] = weights.get(self.clusters[neighbour], 0.0) + weight
+        self.clusters[from_id] = max(weights, key=lambda cluster: (weights[cluster], -cluster))
+        self._record_change()
+
+    def remove_node(self, pdf_id: int) -> None:
+        if self.positions.pop(pdf_id, None) is None:
+            return
+        self.clusters.pop(pdf_id, None)
+        for neighbour in self.adjacency.pop(pdf_id, {}):
+            self.adjacency.get(neighbour, {}).pop(pdf_id, None)
+        self._record_change()
+
+
+class LayoutCache:
+    """Per-user GraphLayout objects"""
+
+    def __init__(self):
+        self.layouts: Dict[str, GraphLayout] = {}
+
+    def get(self, user_id: str) -> Optional[GraphLayout]:
+        layout = self.layouts.get(user_id)
+        if layout is None or layout.stale:
+            return None
+        return layout
+
+    def store(self, user_id: str, layout: GraphLayout) -> None:
+        self.layouts[user_id] = layout
+
+    def add_node(self, pdf_id: int, user_id: str) -> None:
+        layout = self.layouts.get(user_id)
+        if layout is not None:
+            layout.add_node(pdf_id)
+
+    def add_edge(self, from_id: int, to_id: int, confidence: float, user_id: str) -> None:
+        layout = self.layouts.get(user_id)
+        if layout is not None:
+            layout.add_edge(from_id, to_id, confidence)
+
+    def remove_node(self, pdf_id: int, user_id: str) -> None:
+        layout = self.layouts.get(user_id)
+        if layout is not None:
+            layout.remove_node(pdf_id)
+
+    def invalidate(self, user_id: str) -> None:
+        layout = self.layouts.get(user_id)
+        if layout is not None:
+            layout.stale = True
+
+
+layout_cache = LayoutCache()
@@ -0,0 +1,350 @@
+"""
+In-Memory Graph Mirror Module
+Compact CSR (compressed sparse row) copy of the RelatedTo graph for fast
+neighbour, degree and k-hop reads without a Helix round-trip
+"""
+
+import os
+from array import array
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Mirror Configuration from environment variables
+GRAPH_MIRROR_ENABLED = os.getenv('GRAPH_MIRROR_ENABLED', 'false').lower() == 'true'
+GRAPH_MIRROR_COMPACT_THRESHOLD = int(os.getenv('GRAPH_MIRROR_COMPACT_THRESHOLD', 4096))  # pending edges before rebuild
+
+RELATIONSHIP_TYPES = ["similar_topic", "prerequisite", "references", "extends", "contradicts"]
+
+# Each relationship is stored once, from the newer PDF to the older one. These
+# types only mean something in the stored direction; the rest are symmetric.
+DIRECTED_RELATIONSHIP_TYPES = {"prerequisite", "references", "extends"}
+
+INCOMING_FLAG = 0x80  # set on the reverse adjacency entry of a stored edge
+REMOVED = -1          # CSR index of an adjacency entry dropped since the last build
+
+
+class GraphMirror:
+    """
+    Array-backed adjacency mirror of PDF nodes and RelatedTo edges
+
+    Nodes are dense integer indices, looked up by (user_id, pdf_id) since
+    pdf_id is only unique per user. Each stored edge appears in the rows of
+    both endpoints, the reverse entry carrying INCOMING_FLAG in its type code.
+    Edges live in CSR arrays (indptr, indices, relationship type codes,
+    float32 confidences); edges written
+    after the last build sit in a small per-node delta list until the next
+    compaction. Titles and user ids are interned in a shared string table.
+    Deleted nodes and dropped CSR entries are tombstoned and skipped on
+    read until the next compaction.
+    """
+
+    def __init__(self):
+        self.loaded = False
+        self._strings: List[str] = []
+        self._string_codes: Dict[str, int] = {}
+        self._type_codes: Dict[str, int] = {}
+        self._types: List[str] = []
+        for relationship_type in RELATIONSHIP_TYPES:
+            self._type_code(relationship_type)
+        self._reset()
+
+    def _reset(self) -> None:
+        self._node_index: Dict[Tuple[str, int], int] = {}   # (user_id, pdf_id) -> node index
+        self._pdf_ids = array('i')               # node index -> pdf_id
+        self._titles = array('i')                # node index -> string code
+        self._users = array('i')                 # node index -> string code
+        self._alive = bytearray()
+        self._indptr = array('q', [0])
+        self._indices = array('i')
+        self._rel_codes = array('B')
+        self._confidences = array('f')
+        self._delta: Dict[int, list] = {}        # node index -> [(target, code, confidence)]
+        self._delta_count = 0
+        self._removed_count = 0                  # tombstoned CSR entries
+
+    # ---------- interning ----------
+
+    def _intern(self, value: str) -> int:
+        code = self._string_codes.get(value)
+        if code is None:
+            code = len(self._strings)
+            self._strings.append(value)
+            self._string_codes[value] = code
+        return code
+
+    def _type_code(self, relationship_type: str) -> int:
+        code = self._type_codes.get(relationship_type)
+        if code is None:
+            if len(self._types) >= INCOMING_FLAG:
+                raise ValueError("Too many distinct relationship types for the mirror")
+            code = len(self._types)
+            self._types.append(relationship_type)
+            self._type_codes[relationship_type] = code
+        return code
+
+    # ---------- building ----------
+
+    def load(self, pdfs: List[dict], edges: List[dict]) -> None:
+        """
+        Rebuild the mirror from full node and edge lists
+
+        Args:
+            pdfs: PDF nodes (pdf_id, title, user_id)
+            edges: RelatedTo edges (from_id, to_id, relationship_type,
+                confidence, user_id); both endpoints belong to user_id
+        """
+        self._reset()
+        for pdf in pdfs:
+            self.add_node(pdf["pdf_id"], pdf.get("title", ""), pdf.get("user_id", ""))
+        for edge in edges:
+            self.add_edge(edge["from_id"], edge["to_id"], edge["relationship_type"], edge["confidence"], edge.get("user_id", ""))
+        self.compact()
+        self.loaded = True
+
+    def compact(self) -> None:
+        """Fold pending delta edges into the CSR arrays and drop tombstoned edges and nodes"""
+        node_count = len(self._pdf_ids)
+        indptr = array('q', [0])
+        indices = array('i')
+        rel_codes = array('B')
+        confidences = array('f')
+
+        for node in range(node_count):
+            if self._alive[node]:
+                for target, code, confidence in self._iter_edges(node):
+                    if not self._alive[target]:
+                        continue
+                    indices.append(target)
+                    rel_codes.append(code)
+                    confidences.append(confidence)
+            indptr.append(len(indices))
+
+        self._indptr = indptr
+        self._indices = indices
+        self._rel_codes = rel_codes
+        self._confidences = confidences
+        self._delta = {}
+        self._delta_count = 0
+        self._removed_count = 0
+
+    # ---------- sync from write paths ----------
+
+    def add_node(self, pdf_id: int, title: str, user_id: str) -> None:
+        """Add a node; re-adding a deleted pdf_id starts it with no edges"""
+        existing = self._node_index.get((user_id, pdf_id))
+        if existing is not None and self._alive[existing]:
+            self._titles[existing] = self._intern(title)
+            return
+
+        node = len(self._pdf_ids)
+        self._node_index[(user_id, pdf_id)] = node
+        self._pdf_ids.append(pdf_id)
+        self._titles.append(self._intern(title))
+        self._users.append(self._intern(user_id))
+        self._alive.append(1)
+        # New rows have no CSR edges yet
+        self._indptr.append(self._indptr[-1])
+
+    def add_edge(self, from_id: int, to_id: int, relationship_type: str, confidence: float, user_id: str) -> None:
+        source = self._node_index.get((user_id, from_id))
+        target = self._node_index.get((user_id, to_id))
+        if source is None or target is None:
+            return
+        code = self._type_code(relationship_type)
+        self._delta.setdefault(source, []).append((target, code, confidence))
+        self._delta.setdefault(target, []).append((source, code | INCOMING_FLAG, confidence))
+        self._delta_count += 2
+        self._maybe_compact()
+
+    def remove_out_edges(self, pdf_id: int, user_id: str) -> None:
+        """
+        Drop the edges stored from a PDF (both adjacency entries of each)
+
+        Only the rows of the PDF and its targets are touched: CSR entries are
+        tombstoned and delta entries removed, so re-analysing many PDFs does
+        not rebuild the whole mirror each time.
+        """
+        node = self._node_index.get((user_id, pdf_id))
+        if node is None:
+            return
+        targets = set()
+        for i in range(self._indptr[node], self._indptr[node + 1]):
+            if self._indices[i] != REMOVED and not self._rel_codes[i] & INCOMING_FLAG:
+                targets.add(self._indices[i])
+                self._tombstone(i)
+        targets.update(target for target, code, _ in self._delta.get(node, ()) if not code & INCOMING_FLAG)
+        self._drop_delta(node, lambda target, code: not code & INCOMING_FLAG)
+
+        # The reverse entries: incoming from this PDF in each target's row
+        for target in targets:
+            for i in range(self._indptr[target], self._indptr[target + 1]):
+                if self._indices[i] == node and self._rel_codes[i] & INCOMING_FLAG:
+                    self._tombstone(i)
+            self._drop_delta(target, lambda source, code: source == node and code & INCOMING_FLAG)
+        self._maybe_compact()
+
+    def _tombstone(self, i: int) -> None:
+        self._indices[i] = REMOVED
+        self._removed_count += 1
+
+    def _drop_delta(self, node: int, drop) -> None:
+        entries = self._delta.get(node)
+        if not entries:
+            return
+        kept = [entry for entry in entries if not drop(entry[0], entry[1])]
+        self._delta_count -= len(entries) - len(kept)
+        self._delta[node] = kept
+
+    def _maybe_compact(self) -> None:
+        if self._delta_count + self._removed_count >= GRAPH_MIRROR_COMPACT_THRESHOLD:
+            self.compact()
+
+    def remove_node(self, pdf_id: int, user_id: str) -> None:
+        node = self._node_index.pop((user_id, pdf_id), None)
+        if node is None:
+            return
+        self._alive[node] = 0
+        self._delta_count -= len(self._delta.pop(node, []))
+
+    # ---------- reads ----------
+
+    def _iter_edges(self, node: int):
+        start, end = self._indptr[node], self._indptr[node + 1]
+        for i in range(start, end):
+            if self._indices[i] != REMOVED:
+                yield self._indices[i], self._rel_codes[i], self._confidences[i]
+        yield from self._delta.get(node, ())
+
+    def _iter_live_edges(self, node: int, type_code: Optional[int], min_confidence: float, directed: bool = False):
+        for target, code, confidence in self._iter_edges(node):
+            if not self._alive[target]:
+                continue
+            base_code = code & ~INCOMING_FLAG
+            if type_code is not None and base_code != type_code:
+                continue
+            if confidence < min_confidence:
+                continue
+            if directed and code & INCOMING_FLAG and self._types[base_code] in DIRECTED_RELATIONSHIP_TYPES:
+                continue
+            yield target, code, confidence
+
+    def has_node(self, pdf_id: int, user_id: str) -> bool:
+        return (user_id, pdf_id) in self._node_index
+
+    def degree(self, pdf_id: int, user_id: str) -> int:
+        node = self._node_index.get((user_id, pdf_id))
+        if node is None:
+            return 0
+        return sum(1 for _ in self._iter_live_edges(node, None, 0.0))
+
+    def neighbors(self, pdf_id: int, user_id: str, relationship_type: Optional[str] = None, min_confidence: float = 0.0) -> List[dict]:
+        """Direct neighbours of a PDF with the edge that connects them"""
+        return self.k_hop(pdf_id, user_id, 1, relationship_type, min_confidence)
+
+    def k_hop(self, pdf_id: int, user_id: str, hops: int, relationship_type: Optional[str] = None, min_confidence: float = 0.0, directed: bool = False) -> List[dict]:
+        """
+        Breadth-first expansion up to a number of hops
+
+        Args:
+            pdf_id: Start PDF
+            user_id: Owner of the start PDF
+            hops: Maximum depth
+            relationship_type: Only follow edges of this type
+            min_confidence: Only follow edges at or above this confidence
+            directed: Follow directed relationship types only in their stored
+                direction (symmetric types are always followed both ways)
+
+        Returns:
+            list: One entry per reached PDF (closest first) with its depth
+            and the edge it was first reached through ("direction" is "out"
+            when the edge is stored from the earlier PDF on the path)
+        """
+        start = self._node_index.get((user_id, pdf_id))
+        if start is None:
+            return []
+        type_code = None
+        if relationship_type is not None:
+            type_code = self._type_codes.get(relationship_type)
+            if type_code is None:
+                return []
+
+        visited = {start}
+        frontier = deque([(start, 0)])
+        reached = []
+        while frontier:
+            node, depth = frontier.popleft()
+            if depth == hops:
+                continue
+            for target, code, confidence in self._iter_live_edges(node, type_code, min_confidence, directed):
+                if target in visited:
+                    continue
+                visited.add(target)
+                reached.append({
+                    "pdf_id": self._pdf_ids[target],
+                    "title": self._strings[self._titles[target]],
+                    "depth": depth + 1,
+                    "from_id": self._pdf_ids[node],
+                    "relationship_type": self._types[code & ~INCOMING_FLAG],
+                    "direction": "in" if code & INCOMING_FLAG else "out",
+                    "confidence": round(confidence, 4)
+                })
+                frontier.append((target, depth + 1))
+        return reached
+
+    def stats(self) -> dict:
+        arrays = [self._pdf_ids, self._titles, self._users, self._indptr,
+                  self._indices, self._rel_codes, self._confidences]
+        return {
+            "nodes": len(self._node_index),
+            "edges": (len(self._indices) - self._removed_count + self._delta_count) // 2,
+            "pending_edges": self._delta_count // 2,
+            "array_bytes": sum(a.itemsize * len(a) for a in arrays) + len(self._alive),
+            "strings": len(self._strings)
+        }
+
+
+graph_mirror = GraphMirror()
+
+
+def _endpoint_field(value, field: str = "pdf_id"):
+    if isinstance(value, list):
+        value = value[0] if value else None
+    if isinstance(value, dict):
+        value = value.get(field)
+    return value
+
+
+def parse_relationship_rows(result: list) -> List[dict]:
+    """
+    Normalize getAllRelationships output to flat edge dicts
+
+    Helix returns the endpoint ids as nested objects ({"pdf_id": 3}, possibly
+    wrapped in a list) inside an 'edges' key; nested and flat forms are
+    accepted. The owning user_id is carried through when the query returns it.
+    """
+    rows = result
+    if isinstance(result, list) and result and isinstance(result[0], dict) and 'edges' in result[0]:
+        rows = result[0]['edges']
+
+    edges = []
+    for row in rows or []:
+        from_id = _endpoint_field(row.get("from_id"))
+        to_id = _endpoint_field(row.get("to_id"))
+        if from_id is None or to_id is None:
+            continue
+        edge = {
+            "from_id": from_id,
+            "to_id": to_id,
+            "relationship_type": row.get("relationship_type", ""),
+            "confidence": row.get("confidence", 0.0)
+        }
+        if "edge_id" in row:
+            edge["edge_id"] = row["edge_id"]
+        if "user_id" in row:
+            edge["user_id"] = _endpoint_field(row["user_id"], "user_id")
+        edges.append(edge)
+    return edges
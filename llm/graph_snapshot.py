@@ -0,0 +1,216 @@
+"""
+Graph Snapshot Script
+
+Exports all PDF nodes and RelatedTo edges from Helix into a compact columnar
+snapshot, and bulk-loads a snapshot back into Helix.
+
+Snapshot format (gzip-compressed JSON):
+- Nodes and edges are stored column by column
+- Numeric columns (pdf_id, from_id, to_id, confidence) are little-endian
+  int32 / float64 arrays, base64 encoded
+- Low-cardinality string columns (user_id, relationship_type,
+  analysis_version) are dictionary encoded: a value table plus int32 codes
+- Edges carry their owner's user_id, since pdf_id is only unique per user
+"""
+
+import base64
+import gzip
+import json
+import sys
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from helix_utils import HelixRequestError, query_helix_sync
+from graph_mirror import parse_relationship_rows
+
+# Configuration
+SNAPSHOT_FORMAT = "nmapper-graph-snapshot"
+SNAPSHOT_VERSION = 2  # 2: edges carry user_id
+IMPORT_BATCH_SIZE = 5000   # nodes/edges per bulk query
+IMPORT_WORKERS = 4         # bulk queries in flight at once
+IMPORT_BATCH_TIMEOUT = 300  # seconds to wait for one bulk query (writes are not retried)
+
+NODE_TEXT_COLUMNS = ["title", "summary", "filename", "upload_date"]
+NODE_DICT_COLUMNS = ["user_id", "analysis_version"]
+
+
+# ---------- column encoding ----------
+
+def _pack(typecode: str, values: list) -> str:
+    packed = array(typecode, values)
+    if sys.byteorder != "little":
+        packed.byteswap()
+    return base64.b64encode(packed.tobytes()).decode()
+
+
+def _unpack(typecode: str, data: str) -> list:
+    unpacked = array(typecode)
+    unpacked.frombytes(base64.b64decode(data))
+    if sys.byteorder != "little":
+        unpacked.byteswap()
+    return unpacked.tolist()
+
+
+def _dict_encode(values: list) -> dict:
+    table: Dict[str, int] = {}
+    codes = [table.setdefault(value, len(table)) for value in values]
+    return {"values": list(table), "codes": _pack('i', codes)}
+
+
+def _dict_decode(column: dict) -> list:
+    values = column["values"]
+    return [values[code] for code in _unpack('i', column["codes"])]
+
+
+# ---------- export ----------
+
+def export_snapshot(path: str) -> Dict:
+    """Write every PDF node and RelatedTo edge to a snapshot file."""
+    started = time.time()
+
+    result = query_helix_sync("getAllPDFs", {})
+    pdfs = result[0].get("pdfs", []) if result and isinstance(result[0], dict) else []
+    edges = parse_relationship_rows(query_helix_sync("getAllRelationships", {}))
+
+    snapshot = {
+        "format": SNAPSHOT_FORMAT,
+        "version": SNAPSHOT_VERSION,
+        "node_count": len(pdfs),
+        "edge_count": len(edges),
+        "nodes": {
+            "pdf_id": _pack('i', [pdf["pdf_id"] for pdf in pdfs]),
+            **{column: [pdf.get(column) or "" for pdf in pdfs] for column in NODE_TEXT_COLUMNS},
+            **{column: _dict_encode([pdf.get(column) or "" for pdf in pdfs]) for column in NODE_DICT_COLUMNS}
+        },
+        "edges": {
+            "from_id": _pack('i', [edge["from_id"] for edge in edges]),
+            "to_id": _pack('i', [edge["to_id"] for edge in edges]),
+            "user_id": _dict_encode([edge.get("user_id") or "" for edge in edges]),
+            "relationship_type": _dict_encode([edge["relationship_type"] for edge in edges]),
+            "confidence": _pack('d', [float(edge["confidence"]) for edge in edges])
+        }
+    }
+
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        json.dump(snapshot, f, separators=(",", ":"))
+
+    print(f"✅ Exported {len(pdfs)} PDFs and {len(edges)} edges to {path} in {time.time() - started:.1f}s")
+    return {"nodes": len(pdfs), "edges": len(edges)}
+
+
+# ---------- import ----------
+
+def read_snapshot(path: str) -> tuple:
+    """Decode a snapshot file into (nodes, edges) row lists."""
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        snapshot = json.load(f)
+
+    if snapshot.get("format") != SNAPSHOT_FORMAT or snapshot.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"{path} is not a version {SNAPSHOT_VERSION} graph snapshot")
+
+    node_columns = snapshot["nodes"]
+    columns = {"pdf_id": _unpack('i', node_columns["pdf_id"])}
+    columns.update({column: node_columns[column] for column in NODE_TEXT_COLUMNS})
+    columns.update({column: _dict_decode(node_columns[column]) for column in NODE_DICT_COLUMNS})
+    nodes = [dict(zip(columns, row)) for row in zip(*columns.values())]
+
+    edge_columns = snapshot["edges"]
+    edges = [
+        {"from_id": from_id, "to_id": to_id, "user_id": user_id, "relationship_type": relationship_type, "confidence": confidence}
+        for from_id, to_id, user_id, relationship_type, confidence in zip(
+            _unpack('i', edge_columns["from_id"]),
+            _unpack('i', edge_columns["to_id"]),
+            _dict_decode(edge_columns["user_id"]),
+            _dict_decode(edge_columns["relationship_type"]),
+            _unpack('d', edge_columns["confidence"])
+        )
+    ]
+    return nodes, edges
+
+
+def _load_batches(query_name: str, key: str, rows: List[dict]) -> tuple:
+    """
+    Send rows to a bulk query in batches, several at a time.
+
+    Returns (failed, unknown) row counts: a batch Helix rejected was not
+    applied, but one that timed out or lost its connection may have been.
+    """
+    batches = [rows[i:i + IMPORT_BATCH_SIZE] for i in range(0, len(rows), IMPORT_BATCH_SIZE)]
+
+    def send(batch: List[dict]) -> tuple:
+        try:
+            query_helix_sync(query_name, {key: batch}, retry_reads=False, read_timeout=IMPORT_BATCH_TIMEOUT)
+            return 0, 0
+        except HelixRequestError as e:
+            print(f"❌ {query_name} batch of {len(batch)} rejected: {e}")
+            return len(batch), 0
+        except Exception as e:
+            print(f"⚠️  {query_name} batch of {len(batch)} may not have been applied: {e}")
+            return 0, len(batch)
+
+    with ThreadPoolExecutor(max_workers=IMPORT_WORKERS) as executor:
+        results = list(executor.map(send, batches))
+    return sum(failed for failed, _ in results), sum(unknown for _, unknown in results)
+
+
+def import_snapshot(path: str, force: bool = False) -> Dict:
+    """
+    Bulk-load a snapshot into Helix (nodes first, then edges).
+
+    The bulk queries are not idempotent (re-running them duplicates nodes
+    and edges), so the target must be empty unless force is set.
+    """
+    started = time.time()
+    nodes, edges = read_snapshot(path)
+
+    if not force:
+        result = query_helix_sync("getAllPDFs", {})
+        existing = result[0].get("pdfs", []) if result and isinstance(result[0], dict) else []
+        if existing:
+            raise ValueError(f"Target already holds {len(existing)} PDFs; import into an empty database or pass --force")
+
+    failed_nodes, unknown_nodes = _load_batches("addPDFs", "pdfs", nodes)
+    failed_edges, unknown_edges = _load_batches("relatePDFsBulk", "edges", edges)
+
+    print(f"✅ Imported {len(nodes) - failed_nodes - unknown_nodes} PDFs and {len(edges) - failed_edges - unknown_edges} edges in {time.time() - started:.1f}s")
+    if failed_nodes or failed_edges:
+        print(f"❌ Failed: {failed_nodes} PDFs, {failed_edges} edges")
+    if unknown_nodes or unknown_edges:
+        print(f"⚠️  Unknown (timed out, may have been applied): {unknown_nodes} PDFs, {unknown_edges} edges")
+    return {
+        "nodes": len(nodes),
+        "edges": len(edges),
+        "failed_nodes": failed_nodes,
+        "failed_edges": failed_edges,
+        "unknown_nodes": unknown_nodes,
+        "unknown_edges": unknown_edges
+    }
+
+
+def main():
+    """Main entry point."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export or import a compact snapshot of the PDF graph")
+    parser.add_argument("command", choices=["export", "import"])
+    parser.add_argument("path", help="Snapshot file (e.g. graph.snapshot.gz)")
+    parser.add_argument("--force", action="store_true", help="Import even if the target already has PDFs (creates duplicates)")
+
+    args = parser.parse_args()
+
+    print("📦 PDF graph snapshot")
+    print("=" * 60)
+    if args.command == "export":
+        export_snapshot(args.path)
+    else:
+        try:
+            import_snapshot(args.path, force=args.force)
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Helix Database Utility Module
+Async access layer for the local Helix instance: pooled HTTP connections,
+per-query timeouts and retries, a circuit breaker, and coalescing of
+identical in-flight reads
+"""
+
+import asyncio
+import json
+import os
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from dotenv import load_dotenv
+
+from resilience import Dependency
+
+load_dotenv()
+
+# Helix Configuration from environment variables
+HELIX_HOST = os.getenv('HELIX_HOST', 'localhost')
+HELIX_PORT = int(os.getenv('HELIX_PORT', 6969))
+HELIX_URL = f"http://{HELIX_HOST}:{HELIX_PORT}"
+HELIX_POOL_SIZE = int(os.getenv('HELIX_POOL_SIZE', 32))
+HELIX_CONNECT_TIMEOUT = float(os.getenv('HELIX_CONNECT_TIMEOUT', 2.0))
+HELIX_READ_TIMEOUT = float(os.getenv('HELIX_READ_TIMEOUT', 10.0))
+HELIX_MAX_RETRIES = int(os.getenv('HELIX_MAX_RETRIES', 2))
+HELIX_RETRY_BACKOFF = float(os.getenv('HELIX_RETRY_BACKOFF', 0.1))  # seconds, doubled per attempt
+# Seconds per query: by default the worst case of all attempts and backoffs
+HELIX_DEADLINE = float(os.getenv(
+    'HELIX_DEADLINE',
+    (HELIX_MAX_RETRIES + 1) * (HELIX_CONNECT_TIMEOUT + HELIX_READ_TIMEOUT)
+    + HELIX_RETRY_BACKOFF * (2 ** HELIX_MAX_RETRIES - 1) + 1
+))
+
+# Pooled HTTP session (one keep-alive pool to the Helix instance), created
+# lazily once per process so forked workers never share sockets
+_helix_session = None
+_helix_session_pid = None
+
+# In-flight read query tasks, keyed by (query_name, canonical payload)
+_inflight: dict = {}
+
+
+class HelixQueryError(Exception):
+    """Raised when a Helix query fails after all retries"""
+
+
+class HelixRequestError(HelixQueryError):
+    """Raised when Helix rejects a query (4xx): Helix itself is healthy"""
+
+
+# Deadline, bulkhead and circuit breaker for async callers
+helix = Dependency("helix", HELIX_DEADLINE, HELIX_POOL_SIZE, healthy_errors=(HelixRequestError,))
+
+
+def get_helix_session() -> requests.Session:
+    """Get the pooled Helix session for the current process"""
+    global _helix_session, _helix_session_pid
+    if _helix_session is None or _helix_session_pid != os.getpid():
+        session = requests.Session()
+        session.mount(
+            'http://',
+            HTTPAdapter(pool_connections=1, pool_maxsize=HELIX_POOL_SIZE)
+        )
+        _helix_session = session
+        _helix_session_pid = os.getpid()
+    return _helix_session
+
+
+def _never_sent(error: requests.ConnectionError) -> bool:
+    """True if the request cannot have reached Helix (no connection was established)"""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+
+
+def query_helix_sync(query_name: str, payload: dict = None, retry_reads: bool = True, read_timeout: float = None) -> list:
+    """
+    Run a single Helix query over the pooled session
+
+    Args:
+        query_name: Name of the HelixQL query (e.g., "getAllPDFs")
+        payload: Query parameters
+        retry_reads: Retry on timeouts and 5xx responses as well as on
+            connection errors. Writes pass False so a request that may have
+            reached Helix is never replayed.
+        read_timeout: Seconds to wait for the response (default
+            HELIX_READ_TIMEOUT); bulk loads need longer
+
+    Returns:
+        list: Query response wrapped in a list (same shape as helix.Client.query)
+    """
+    url = f"{HELIX_URL}/{query_name}"
+    last_error = None
+
+    for attempt in range(HELIX_MAX_RETRIES + 1):
+        if attempt:
+            time.sleep(HELIX_RETRY_BACKOFF * (2 ** (attempt - 1)))
+        try:
+            response = get_helix_session().post(
+                url,
+                json=payload or {},
+                timeout=(HELIX_CONNECT_TIMEOUT, read_timeout or HELIX_READ_TIMEOUT)
+            )
+            if response.status_code >= 500 and retry_reads:
+                last_error = HelixQueryError(f"{query_name} returned {response.status_code}: {response.text}")
+                continue
+            if response.status_code >= 500:
+                raise HelixQueryError(f"{query_name} returned {response.status_code}: {response.text}")
+            if response.status_code >= 400:
+                raise HelixRequestError(f"{query_name} returned {response.status_code}: {response.text}")
+            return [response.json()]
+
+        except requests.ConnectionError as e:
+            last_error = e
+            # A dropped keep-alive connection also raises ConnectionError, after
+            # the request was sent; only a connection that was never
+            # established is safe to retry for writes
+            if not retry_reads and not _never_sent(e):
+                break
+        except requests.Timeout as e:
+            last_error = e
+            if not retry_reads:
+                break
+
+    raise HelixQueryError(f"{query_name} failed after {attempt + 1} attempt(s): {last_error}")
+
+
+async def helix_read(query_name: str, payload: dict = None) -> list:
+    """
+    Run a read query without blocking the event loop
+
+    Concurrent calls with the same query name and payload share one
+    in-flight request to Helix.
+
+    Args:
+        query_name: Name of the HelixQL query
+        payload: Query parameters
+
+    Returns:
+        list: Query response
+    """
+    key = (query_name, json.dumps(payload or {}, sort_keys=True))
+
+    # The shared fetch runs as its own task: a caller that is cancelled stops
+    # waiting for it, but neither cancels it nor fails the other callers
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(helix.run_sync(query_helix_sync, query_name, payload, True))
+        _inflight[key] = task
+        task.add_done_callback(lambda done: _finish_read(key, done))
+
+    return await asyncio.shield(task)
+
+
+def _finish_read(key: tuple, task: asyncio.Future) -> None:
+    if _inflight.get(key) is task:
+        del _inflight[key]
+    if not task.cancelled():
+        # Mark the exception as retrieved in case every caller was cancelled
+        task.exception()
+
+
+async def helix_write(query_name: str, payload: dict = None) -> list:
+    """
+    Run a write query without blocking the event loop (never coalesced)
+
+    Args:
+        query_name: Name of the HelixQL query
+        payload: Query parameters
+
+    Returns:
+        list: Query response
+    """
+    return await helix.run_sync(query_helix_sync, query_name, payload, False)
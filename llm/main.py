@@ -1,22 +1,36 @@
+import asyncio
+import hashlib
 import json
 import os
 import subprocess
 from datetime import datetime
 from dotenv import load_dotenv
-from fastapi import FastAPI, Request, status, UploadFile, File
+from fastapi import FastAPI, Request, Response, status, UploadFile, File
 import uvicorn
 from fastapi.params import Body
 from pydantic_ai import Agent, RunContext
 from pydantic import BaseModel, ConfigDict
 from typing import Optional, List
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 import PyPDF2
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 import requests
-import helix
-from s3_utils import upload_pdf_to_s3, download_pdf_from_s3, delete_pdf_from_s3, generate_presigned_url, verify_s3_connection, S3_PRESIGNED_URL_EXPIRATION
+from s3_utils import s3, upload_pdf_to_s3, download_pdf_from_s3, delete_pdf_from_s3, delete_pdfs_from_s3, generate_presigned_url, verify_s3_connection, S3_PRESIGNED_URL_EXPIRATION
+from helix_utils import helix, helix_read, helix_write
+from resilience import Dependency
+from cache_utils import pdf_cache, pdfs_key, related_key, invalidate_user_pdfs, invalidate_related, invalidate_pdf
+from graph_mirror import graph_mirror, parse_relationship_rows, GRAPH_MIRROR_ENABLED, DIRECTED_RELATIONSHIP_TYPES
+from search_index import search_index, write_snapshot, SEARCH_INDEX_FULL_TEXT, SEARCH_INDEX_SAVE_INTERVAL
+from text_cache import get_cached_text, cache_text, delete_cached_text
+from graph_layout import GraphLayout, layout_cache
+from connection_cache import content_hash, get_pairs, store_pairs, prune as prune_connection_cache
+from pdf_validation import PDFValidationError, read_upload, inspect_pdf, reserve_upload, release_uploads, get_usage
+import worker_sync
+from worker_sync import WEB_CONCURRENCY, WORKER_SYNC_ENABLED, WORKER_SYNC_INTERVAL
 import uuid
-import tempfile
+import io
 
 class Output(BaseModel):
     title: str
@@ -27,6 +41,10 @@ class ConnectionAnalysis(BaseModel):
     """Model for analyzing connections between PDFs"""
     related_pdfs: List[dict]  # List of {pdf_id, relationship_type, confidence}
 
+class BatchConnectionAnalysis(BaseModel):
+    """Model for analyzing connections of a batch of new PDFs at once"""
+    related_pairs: List[dict]  # List of {from_id, to_id, relationship_type, confidence}
+
 
 
 load_dotenv()
@@ -60,27 +78,65 @@ For each relationship, provide:
 Only include relationships with confidence >= 0.6
 """
 
+batch_connection_prompt = """
+# Role
+You are an expert at analyzing relationships between academic and technical documents.
+
+# Task
+Given a batch of new PDFs and a list of existing PDFs, each with an ID, title and summary,
+identify which PDFs each new PDF is related to: other new PDFs in the batch and existing PDFs.
+
+# Instructions
+For each relationship, provide:
+- from_id: The ID of the new PDF
+- to_id: The ID of the related PDF (a new PDF with a lower ID, or an existing PDF)
+- relationship_type: One of ["similar_topic", "prerequisite", "references", "extends", "contradicts"],
+  describing what the to_id PDF is to the from_id PDF
+- confidence: A score from 0.0 to 1.0 indicating how confident you are in this relationship
+
+Only include relationships with confidence >= 0.6
+"""
+
+ANALYSIS_MODEL = 'gemini-2.5-flash'
+
+# Stored on every PDF node; changes whenever the model or a prompt changes,
+# which marks previously analysed PDFs as stale (see /reanalyze/)
+ANALYSIS_VERSION = hashlib.sha256(
+    "\n".join([ANALYSIS_MODEL, prompt, connection_prompt, batch_connection_prompt]).encode()
+).hexdigest()[:12]
+
+REANALYZE_CONCURRENCY = int(os.getenv('REANALYZE_CONCURRENCY', 4))  # PDFs re-analysed at once
+
 generator_agent = Agent(
-    'gemini-2.5-flash',
+    ANALYSIS_MODEL,
     output_type=Output,
     system_prompt=prompt,
     deps_type=str
 )
 
 connection_agent = Agent(
-    'gemini-2.5-flash',
+    ANALYSIS_MODEL,
     output_type=ConnectionAnalysis,
     system_prompt=connection_prompt,
     deps_type=str
 )
 
-db = helix.Client(local=True, verbose=True)
+batch_connection_agent = Agent(
+    ANALYSIS_MODEL,
+    output_type=BatchConnectionAnalysis,
+    system_prompt=batch_connection_prompt,
+    deps_type=str
+)
+
+BATCH_CONCURRENCY = int(os.getenv('BATCH_CONCURRENCY', 4))  # files extracted/summarized at once
 
-# Database is initialized when Client is created
+# Deadline, bulkhead and circuit breaker shared by all agent calls
+LLM_DEADLINE = float(os.getenv('LLM_DEADLINE', 90.0))  # seconds per agent run
+LLM_CONCURRENCY = int(os.getenv('LLM_CONCURRENCY', 8))
+llm = Dependency("llm", LLM_DEADLINE, LLM_CONCURRENCY)
 
-# Verify S3 connection on startup
-if not verify_s3_connection():
-    print("WARNING: S3 connection failed. Check AWS credentials and bucket name in .env file.")
+CONNECTION_BACKFILL_INTERVAL = float(os.getenv('CONNECTION_BACKFILL_INTERVAL', 60.0))  # seconds between backfill rounds
+CONNECTION_BACKFILL_BATCH = 10  # PDFs backfilled per round
 
 def extract_pdf_text(pdf_path: str) -> str:
     """Extract text content from a PDF file."""
@@ -92,38 +148,29 @@ def extract_pdf_text(pdf_path: str) -> str:
     return text
 
 
-def extract_pdf_text_from_s3(s3_key: str) -> str:
-    """Extract text content from a PDF file stored in S3."""
-    try:
-        # Download PDF from S3
-        pdf_content = download_pdf_from_s3(s3_key)
-
-        # Create temporary file
-        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as temp_file:
-            temp_file.write(pdf_content)
-            temp_path = temp_file.name
-
-        # Extract text
-        text = ""
-        with open(temp_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-
-        # Clean up temp file
-        os.unlink(temp_path)
-
-        return text
+def read_pdf_text(pdf_content: bytes) -> tuple:
+    """Extract text content and page count from PDF bytes."""
+    pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_content))
+    if pdf_reader.is_encrypted:
+        pdf_reader.decrypt("")  # owner-password-only PDFs (see pdf_validation)
+    text = ""
+    for page in pdf_reader.pages:
+        text += page.extract_text() + "\n"
+    return text, len(pdf_reader.pages)
 
-    except Exception as e:
-        print(f"Error extracting text from S3 PDF: {e}")
-        raise
 
+async def get_all_pdfs(user_id: Optional[str] = None) -> List[dict]:
+    """Get all PDFs from the database, optionally filtered by user_id (cached until a write)"""
+    cached = pdf_cache.get(pdfs_key(user_id))
+    if cached is not None:
+        return cached
 
-def get_all_pdfs(user_id: Optional[str] = None) -> List[dict]:
-    """Get all PDFs from the database, optionally filtered by user_id"""
     try:
-        result = db.query("getAllPDFs", {})
+        generation = pdf_cache.generation
+        if user_id:
+            result = await helix_read("getPDFsByUser", {"user_id": user_id})
+        else:
+            result = await helix_read("getAllPDFs", {})
         print(f"DEBUG - Raw result from getAllPDFs: {result}")
         print(f"DEBUG - Result type: {type(result)}")
 
@@ -143,6 +190,7 @@ def get_all_pdfs(user_id: Optional[str] = None) -> List[dict]:
             pdfs = [pdf for pdf in pdfs if pdf.get("user_id") == user_id]
             print(f"DEBUG - Filtered PDFs for user {user_id}: {len(pdfs)} found")
 
+        pdf_cache.set(pdfs_key(user_id), pdfs, generation=generation)
         return pdfs
     except Exception as e:
         print(f"Error getting PDFs: {e}")
@@ -151,20 +199,101 @@ def get_all_pdfs(user_id: Optional[str] = None) -> List[dict]:
         return []
 
 
-def add_pdf_to_db(pdf_id: int, title: str, summary: str, filename: str, user_id: str) -> bool:
-    """Add a PDF to the Helix database"""
+# ---------- local state updates ----------
+# Every write path applies its change to this worker's caches, mirror,
+# layout and search index, then publishes it so the other workers replay it
+
+def apply_pdf_added(pdf_id: int, title: str, summary: str, user_id: str, text: Optional[str] = None) -> None:
+    invalidate_user_pdfs(user_id)
+    if graph_mirror.loaded:
+        graph_mirror.add_node(pdf_id, title, user_id)
+    layout_cache.add_node(pdf_id, user_id)
+    search_index.add(pdf_id, user_id, title, summary, text)
+
+
+def apply_edge_added(from_id: int, to_id: int, relationship_type: str, confidence: float, user_id: str) -> None:
+    invalidate_related(from_id, to_id)
+    if graph_mirror.loaded:
+        graph_mirror.add_edge(from_id, to_id, relationship_type, confidence, user_id)
+    layout_cache.add_edge(from_id, to_id, confidence, user_id)
+
+
+def apply_pdf_removed(pdf_id: int, user_id: str) -> None:
+    invalidate_pdf(pdf_id, user_id)
+    if graph_mirror.loaded:
+        graph_mirror.remove_node(pdf_id, user_id)
+    layout_cache.remove_node(pdf_id, user_id)
+    search_index.remove(pdf_id, user_id)
+
+
+def apply_pdf_edges_dropped(pdf_id: int, user_id: str) -> None:
+    """A PDF's outgoing edges were dropped (re-analysis rewrites them)"""
+    if graph_mirror.loaded:
+        graph_mirror.remove_out_edges(pdf_id, user_id)
+    layout_cache.invalidate(user_id)
+    invalidate_pdf(pdf_id, user_id)
+
+
+WORKER_EVENT_HANDLERS = {
+    "pdf_added": apply_pdf_added,
+    "edge_added": apply_edge_added,
+    "pdf_removed": apply_pdf_removed,
+    "pdf_edges_dropped": apply_pdf_edges_dropped,
+}
+
+# A single thread writes the event log, so publishing never blocks the event
+# loop on SQLite and events still reach the log in the order they were recorded
+worker_event_publisher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="worker_sync")
+
+
+def publish_worker_event(kind: str, payload: dict) -> None:
+    if WORKER_SYNC_ENABLED:
+        worker_event_publisher.submit(worker_sync.publish, kind, payload)
+
+
+def record_pdf_added(pdf_id: int, title: str, summary: str, user_id: str, text: Optional[str] = None) -> None:
+    text = text if SEARCH_INDEX_FULL_TEXT else None
+    apply_pdf_added(pdf_id, title, summary, user_id, text)
+    publish_worker_event("pdf_added", {"pdf_id": pdf_id, "title": title, "summary": summary, "user_id": user_id, "text": text})
+
+
+def record_edge_added(from_id: int, to_id: int, relationship_type: str, confidence: float, user_id: str) -> None:
+    apply_edge_added(from_id, to_id, relationship_type, confidence, user_id)
+    publish_worker_event("edge_added", {
+        "from_id": from_id,
+        "to_id": to_id,
+        "relationship_type": relationship_type,
+        "confidence": confidence,
+        "user_id": user_id
+    })
+
+
+def record_pdf_removed(pdf_id: int, user_id: str) -> None:
+    apply_pdf_removed(pdf_id, user_id)
+    publish_worker_event("pdf_removed", {"pdf_id": pdf_id, "user_id": user_id})
+
+
+def record_pdf_edges_dropped(pdf_id: int, user_id: str) -> None:
+    apply_pdf_edges_dropped(pdf_id, user_id)
+    publish_worker_event("pdf_edges_dropped", {"pdf_id": pdf_id, "user_id": user_id})
+
+
+async def add_pdf_to_db(pdf_id: int, title: str, summary: str, filename: str, user_id: str, text: Optional[str] = None) -> bool:
+    """Add a PDF to the Helix database (and the search index; text is indexed if SEARCH_INDEX_FULL_TEXT)"""
     try:
         upload_date = datetime.now().isoformat()
         print(f"DEBUG - Adding PDF with id={pdf_id}, title={title}, user_id={user_id}")
-        result = db.query("addPDF", {
+        result = await helix_write("addPDF", {
             "pdf_id": pdf_id,
             "title": title,
             "summary": summary,
             "filename": filename,
             "upload_date": upload_date,
-            "user_id": user_id
+            "user_id": user_id,
+            "analysis_version": ANALYSIS_VERSION
         })
         print(f"DEBUG - Add PDF result: {result}")
+        record_pdf_added(pdf_id, title, summary, user_id, text)
         return True
     except Exception as e:
         print(f"Error adding PDF: {e}")
@@ -173,66 +302,96 @@ def add_pdf_to_db(pdf_id: int, title: str, summary: str, filename: str, user_id:
         return False
 
 
-def create_pdf_relationship(from_id: int, to_id: int, relationship_type: str, confidence: float) -> bool:
-    """Create bidirectional relationship edges between two PDFs"""
-    forward_success = False
-    reverse_success = False
+async def add_pdfs_to_db(pdfs: List[dict], user_id: str) -> bool:
+    """Add many PDFs ({pdf_id, title, summary, filename, text}) to the Helix database in one query"""
+    try:
+        upload_date = datetime.now().isoformat()
+        print(f"DEBUG - Adding {len(pdfs)} PDFs for user_id={user_id}")
+        result = await helix_write("addPDFs", {
+            "pdfs": [{
+                "pdf_id": pdf["pdf_id"],
+                "title": pdf["title"],
+                "summary": pdf["summary"],
+                "filename": pdf["filename"],
+                "upload_date": upload_date,
+                "user_id": user_id,
+                "analysis_version": ANALYSIS_VERSION
+            } for pdf in pdfs]
+        })
+        print(f"DEBUG - Add PDFs result: {result}")
 
+        for pdf in pdfs:
+            record_pdf_added(pdf["pdf_id"], pdf["title"], pdf["summary"], user_id, pdf.get("text"))
+        return True
+    except Exception as e:
+        print(f"Error adding PDFs: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+async def create_pdf_relationships(edges: List[dict], user_id: str) -> bool:
+    """Create many relationship edges ({from_id, to_id, relationship_type, confidence}) between a user's PDFs in one query"""
+    if not edges:
+        return True
     try:
-        print(f"DEBUG - Creating bidirectional relationship: {from_id} <-> {to_id} ({relationship_type}, {confidence})")
+        print(f"DEBUG - Creating {len(edges)} relationships")
+        result = await helix_write("relatePDFsBulk", {
+            "edges": [{
+                "from_id": edge["from_id"],
+                "to_id": edge["to_id"],
+                "user_id": user_id,
+                "relationship_type": edge["relationship_type"],
+                "confidence": edge["confidence"]
+            } for edge in edges]
+        })
+        print(f"DEBUG - Bulk relationship result: {result}")
 
-        # Create forward relationship
-        try:
-            result1 = db.query("relatePDFs", {
-                "from_id": from_id,
-                "to_id": to_id,
-                "relationship_type": relationship_type,
-                "confidence": confidence
-            })
-            print(f"DEBUG - Forward relationship created ({from_id} -> {to_id}): {result1}")
-            forward_success = True
-        except Exception as e:
-            print(f"Error creating forward relationship ({from_id} -> {to_id}): {e}")
-            import traceback
-            traceback.print_exc()
+        for edge in edges:
+            record_edge_added(edge["from_id"], edge["to_id"], edge["relationship_type"], edge["confidence"], user_id)
+        return True
+    except Exception as e:
+        print(f"Error creating relationships: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
 
-        # Create reverse relationship
-        try:
-            result2 = db.query("relatePDFs", {
-                "from_id": to_id,
-                "to_id": from_id,
-                "relationship_type": relationship_type,
-                "confidence": confidence
-            })
-            print(f"DEBUG - Reverse relationship created ({to_id} -> {from_id}): {result2}")
-            reverse_success = True
-        except Exception as e:
-            print(f"Error creating reverse relationship ({to_id} -> {from_id}): {e}")
-            import traceback
-            traceback.print_exc()
-
-        # Return True only if both edges were created successfully
-        if forward_success and reverse_success:
-            print(f"DEBUG - Both edges created successfully for {from_id} <-> {to_id}")
-            return True
-        else:
-            print(f"DEBUG - Edge creation incomplete: forward={forward_success}, reverse={reverse_success}")
-            return False
+
+async def create_pdf_relationship(from_id: int, to_id: int, relationship_type: str, confidence: float, user_id: str) -> bool:
+    """
+    Create a relationship edge between two PDFs
+
+    The edge is stored once, from the new PDF to the existing one, and read
+    in both directions (see getRelatedPDFs).
+    """
+    try:
+        print(f"DEBUG - Creating relationship: {from_id} -> {to_id} ({relationship_type}, {confidence})")
+        result = await helix_write("relatePDFs", {
+            "from_id": from_id,
+            "to_id": to_id,
+            "user_id": user_id,
+            "relationship_type": relationship_type,
+            "confidence": confidence
+        })
+        print(f"DEBUG - Relationship created ({from_id} -> {to_id}): {result}")
+
+        record_edge_added(from_id, to_id, relationship_type, confidence, user_id)
+        return True
 
     except Exception as e:
-        print(f"Error creating bidirectional relationship: {e}")
+        print(f"Error creating relationship ({from_id} -> {to_id}): {e}")
         import traceback
         traceback.print_exc()
         return False
 
 
-def delete_pdf_from_db(pdf_id: int, user_id: str) -> bool:
+async def delete_pdf_from_db(pdf_id: int, user_id: str) -> bool:
     """Delete a PDF from the Helix database (with user_id verification)"""
     try:
         print(f"DEBUG - Deleting PDF with id={pdf_id} for user={user_id}")
 
         # First verify the PDF belongs to this user
-        all_pdfs = get_all_pdfs(user_id=user_id)
+        all_pdfs = await get_all_pdfs(user_id=user_id)
         pdf_exists = any(pdf.get("pdf_id") == pdf_id for pdf in all_pdfs)
 
         if not pdf_exists:
@@ -240,8 +399,9 @@ def delete_pdf_from_db(pdf_id: int, user_id: str) -> bool:
             return False
 
         # Delete the PDF (this should also cascade delete relationships in Helix)
-        result = db.query("deletePDF", {"pdf_id": pdf_id})
+        result = await helix_write("deletePDF", {"pdf_id": pdf_id, "user_id": user_id})
         print(f"DEBUG - Delete PDF result: {result}")
+        record_pdf_removed(pdf_id, user_id)
         return True
     except Exception as e:
         print(f"Error deleting PDF: {e}")
@@ -250,8 +410,307 @@ def delete_pdf_from_db(pdf_id: int, user_id: str) -> bool:
         return False
 
 
+async def delete_pdfs_from_db(pdf_ids: List[int], user_id: str) -> bool:
+    """Delete many PDFs (already verified to belong to user_id) and their edges in one query"""
+    try:
+        print(f"DEBUG - Deleting {len(pdf_ids)} PDFs for user={user_id}")
+        result = await helix_write("deletePDFs", {"pdf_ids": pdf_ids, "user_id": user_id})
+        print(f"DEBUG - Delete PDFs result: {result}")
+
+        for pdf_id in pdf_ids:
+            record_pdf_removed(pdf_id, user_id)
+        return True
+    except Exception as e:
+        print(f"Error deleting PDFs: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+async def get_related_pdfs(pdf_id: int) -> List[dict]:
+    """Get the PDFs related to a specific PDF (cached until a write)"""
+    cached = pdf_cache.get(related_key(pdf_id))
+    if cached is not None:
+        return cached
+
+    generation = pdf_cache.generation
+    connections = await helix_read("getRelatedPDFs", {"pdf_id": pdf_id})
+    print(f"DEBUG - Raw connections result: {connections}")
+
+    # Handle the nested structure returned by Helix: outgoing edges under
+    # 'related', edges stored from the other PDF under 'related_in'
+    if isinstance(connections, list) and len(connections) > 0:
+        if isinstance(connections[0], dict) and 'related' in connections[0]:
+            outgoing = connections[0].get('related') or []
+            incoming = connections[0].get('related_in') or []
+            seen = set()
+            connections = []
+            for direction, pdfs in (("out", outgoing), ("in", incoming)):
+                for pdf in pdfs:
+                    if pdf.get("pdf_id") in seen:
+                        continue
+                    seen.add(pdf.get("pdf_id"))
+                    connections.append({**pdf, "direction": direction})
+
+    connections = connections if isinstance(connections, list) else []
+    pdf_cache.set(related_key(pdf_id), connections, generation=generation)
+    return connections
+
+
+MAX_TRAVERSAL_DEPTH = 3  # hops unrolled in the traverseRelated queries
+
+
+async def traverse_related(pdf_id: int, user_id: str, relationship_type: Optional[str], depth: int, min_confidence: float, top_k: int) -> List[dict]:
+    """
+    Depth-limited traversal from a PDF in a single Helix round-trip
+
+    Helix expands up to MAX_TRAVERSAL_DEPTH hops, keeping the top_k strongest
+    edges per hop. Directed relationship types follow the stored edge
+    direction only; symmetric types (and untyped traversals) also follow
+    edges backwards, via the *In queries run alongside. Each query keeps one
+    direction for all hops, so a path that goes forward along one edge and
+    backward along the next is not found. Each hop only continues from PDFs
+    first reached at the previous hop, so cycles back to already visited
+    PDFs are dropped.
+
+    Always answered by Helix (even with the graph mirror loaded), so results
+    keep the same top_k cut and node fields either way.
+    """
+    directed = relationship_type in DIRECTED_RELATIONSHIP_TYPES
+
+    if relationship_type:
+        query_name = "traverseRelated"
+        payload = {"pdf_id": pdf_id, "user_id": user_id, "relationship_type": relationship_type, "min_confidence": min_confidence, "top_k": top_k}
+    else:
+        query_name = "traverseRelatedAny"
+        payload = {"pdf_id": pdf_id, "user_id": user_id, "min_confidence": min_confidence, "top_k": top_k}
+
+    queries = [helix_read(query_name, payload)]
+    if not directed:
+        queries.append(helix_read(query_name + "In", payload))
+    results = await asyncio.gather(*queries)
+    print(f"DEBUG - Raw traversal result: {results}")
+
+    def hops_of(result) -> dict:
+        return result[0] if isinstance(result, list) and result and isinstance(result[0], dict) else {}
+
+    hop_results = [("out", hops_of(results[0]))]
+    if not directed:
+        hop_results.append(("in", hops_of(results[1])))
+
+    nodes_by_id = {}
+    for _, hops in hop_results:
+        for hop in range(1, MAX_TRAVERSAL_DEPTH + 1):
+            for node in hops.get(f"n{hop}") or []:
+                nodes_by_id.setdefault(node.get("pdf_id"), node)
+
+    visited = {pdf_id}
+    frontier = {pdf_id}
+    reached = []
+    for hop in range(1, depth + 1):
+        # Orient every edge as (PDF on the path -> newly reached PDF)
+        edges = []
+        for direction, hops in hop_results:
+            for edge in parse_relationship_rows(hops.get(f"e{hop}") or []):
+                if direction == "in":
+                    edge["from_id"], edge["to_id"] = edge["to_id"], edge["from_id"]
+                edges.append((direction, edge))
+        edges.sort(key=lambda item: item[1]["confidence"], reverse=True)
+
+        next_frontier = set()
+        for direction, edge in edges:
+            if edge["from_id"] not in frontier or edge["to_id"] in visited:
+                continue
+            visited.add(edge["to_id"])
+            next_frontier.add(edge["to_id"])
+            reached.append({
+                **nodes_by_id.get(edge["to_id"], {"pdf_id": edge["to_id"]}),
+                "depth": hop,
+                "from_id": edge["from_id"],
+                "relationship_type": edge["relationship_type"],
+                "direction": direction,
+                "confidence": edge["confidence"]
+            })
+        frontier = next_frontier
+
+    return reached
+
+
+async def get_user_edges(user_id: str, pdf_ids: set) -> List[dict]:
+    """Get the edges between a user's PDFs, from the graph mirror if loaded"""
+    if graph_mirror.loaded:
+        edges = []
+        for pdf_id in pdf_ids:
+            for neighbour in graph_mirror.neighbors(pdf_id, user_id):
+                if neighbour["direction"] == "out":
+                    edges.append({
+                        "from_id": pdf_id,
+                        "to_id": neighbour["pdf_id"],
+                        "relationship_type": neighbour["relationship_type"],
+                        "confidence": neighbour["confidence"]
+                    })
+        return edges
+
+    return parse_relationship_rows(await helix_read("getUserRelationships", {"user_id": user_id}))
+
+
+async def get_user_layout(user_id: str, pdfs: List[dict], edges: List[dict]) -> GraphLayout:
+    """Get the cached layout of a user's graph, computing it if missing or stale"""
+    layout = layout_cache.get(user_id)
+    if layout is not None and set(layout.positions) == {pdf["pdf_id"] for pdf in pdfs}:
+        return layout
+
+    layout = GraphLayout()
+    await asyncio.to_thread(layout.compute, [pdf["pdf_id"] for pdf in pdfs], edges)
+    layout_cache.store(user_id, layout)
+    return layout
+
+
+def not_modified(request: Request, response: Response, cache_key: tuple) -> bool:
+    """Set the ETag header for a cached entry and report whether the client copy is current"""
+    etag = pdf_cache.etag(cache_key)
+    if etag is None:
+        return False
+    response.headers["ETag"] = etag
+    return request.headers.get("if-none-match") == etag
+
+
+async def load_graph_mirror() -> None:
+    """Build the in-memory graph mirror from Helix"""
+    try:
+        pdfs = await get_all_pdfs()
+        edges = parse_relationship_rows(await helix_read("getAllRelationships", {}))
+        graph_mirror.load(pdfs, edges)
+        print(f"DEBUG - Graph mirror loaded: {graph_mirror.stats()}")
+    except Exception as e:
+        print(f"Error loading graph mirror: {e}")
+        import traceback
+        traceback.print_exc()
+
+
+async def load_search_index() -> None:
+    """
+    Load the search index snapshot and reconcile it with Helix, or rebuild
+    it from Helix if there is none
+
+    Reconciling picks up PDFs written after the last save (e.g. before a
+    crash, or imported with graph_snapshot.py) and drops deleted ones.
+    """
+    try:
+        if await asyncio.to_thread(search_index.load):
+            indexed, removed = search_index.reconcile(await get_all_pdfs())
+            print(f"DEBUG - Search index loaded: {len(search_index.docs)} documents ({indexed} re-indexed, {removed} removed)")
+            return
+
+        for pdf in await get_all_pdfs():
+            search_index.add(pdf["pdf_id"], pdf.get("user_id", ""), pdf.get("title", ""), pdf.get("summary", ""))
+        print(f"DEBUG - Search index rebuilt from Helix: {len(search_index.docs)} documents")
+    except Exception as e:
+        print(f"Error loading search index: {e}")
+        import traceback
+        traceback.print_exc()
+
+
+async def save_search_index() -> None:
+    """Persist the search index if it changed since the last save"""
+    if not search_index.dirty:
+        return
+    # Cleared before serializing so changes made during the write mark the
+    # index dirty again; a failed write restores the flag for the next save
+    search_index.dirty = False
+    try:
+        await asyncio.to_thread(write_snapshot, search_index.serialize())
+    except Exception as e:
+        search_index.dirty = True
+        print(f"Error saving search index: {e}")
+
+
+async def save_search_index_periodically() -> None:
+    while True:
+        await asyncio.sleep(SEARCH_INDEX_SAVE_INTERVAL)
+        await save_search_index()
+
+
+async def backfill_connections_periodically() -> None:
+    """Work through the queue of PDFs stored while connection analysis was unavailable"""
+    while True:
+        await asyncio.sleep(CONNECTION_BACKFILL_INTERVAL)
+        if not llm.available:
+            continue
+        try:
+            for pdf_id, user_id in await asyncio.to_thread(worker_sync.claim_connection_backfills, CONNECTION_BACKFILL_BATCH):
+                try:
+                    done = await backfill_connections(pdf_id, user_id)
+                except Exception as e:
+                    print(f"Error backfilling connections for PDF {pdf_id}: {e}")
+                    done = False
+                if done:
+                    await asyncio.to_thread(worker_sync.finish_connection_backfill, pdf_id, user_id)
+                else:
+                    await asyncio.to_thread(worker_sync.release_connection_backfill, pdf_id, user_id)
+        except Exception as e:
+            print(f"Error in connection backfill: {e}")
+
+
+async def replay_worker_events() -> None:
+    """Apply state changes published by the other workers"""
+    polls = 0
+    while True:
+        await asyncio.sleep(WORKER_SYNC_INTERVAL)
+        try:
+            for kind, payload in await asyncio.to_thread(worker_sync.poll):
+                # poll() has already moved past these events, so one failing
+                # handler must not cost this worker the rest of the batch
+                try:
+                    WORKER_EVENT_HANDLERS[kind](**payload)
+                except Exception as e:
+                    print(f"Error replaying worker event {kind}: {e}")
+            polls += 1
+            if polls % 1000 == 0:
+                await asyncio.to_thread(worker_sync.prune)
+        except Exception as e:
+            print(f"Error replaying worker events: {e}")
+
+
 app = FastAPI()
 
+# Tasks that must outlive the request that started them (asyncio keeps only weak references)
+background_tasks: set = set()
+
+
+def run_in_background(coro) -> asyncio.Task:
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+
+@app.on_event("startup")
+async def startup():
+    # Verify S3 connection on startup
+    if not await asyncio.to_thread(verify_s3_connection):
+        print("WARNING: S3 connection failed. Check AWS credentials and bucket name in .env file.")
+    if WORKER_SYNC_ENABLED:
+        # Mark the event log position before loading, so writes made by other
+        # workers while this one loads are replayed rather than missed
+        await asyncio.to_thread(worker_sync.start)
+        app.state.worker_event_replayer = asyncio.create_task(replay_worker_events())
+    if GRAPH_MIRROR_ENABLED:
+        await load_graph_mirror()
+    await load_search_index()
+    await asyncio.to_thread(prune_connection_cache, ANALYSIS_VERSION)
+    app.state.search_index_saver = asyncio.create_task(save_search_index_periodically())
+    app.state.connection_backfiller = asyncio.create_task(backfill_connections_periodically())
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    if WORKER_SYNC_ENABLED:
+        app.state.worker_event_replayer.cancel()
+    app.state.connection_backfiller.cancel()
+    app.state.search_index_saver.cancel()
+    await save_search_index()
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -264,7 +723,13 @@ app.add_middleware(
 
 @app.post("/upload/")
 async def upload_pdf(file: UploadFile = File(...), user_id: str = Body(...)):
-    """Upload a PDF file to S3"""
+    """
+    Upload a PDF file to S3
+
+    The file is validated first (size, magic bytes, encryption, page count,
+    text layer) and charged against the user's byte and page quotas, so
+    bad files never reach S3 or the LLM.
+    """
     try:
         # Validate file type
         if not file.filename.endswith('.pdf'):
@@ -273,29 +738,47 @@ async def upload_pdf(file: UploadFile = File(...), user_id: str = Body(...)):
                 "message": "Only PDF files are allowed"
             }
 
-        # Read file content
-        content = await file.read()
+        # Read and validate file content
+        content = await read_upload(file)
+        info = await asyncio.to_thread(inspect_pdf, content)
 
         # Generate unique filename to avoid collisions
         original_filename = file.filename
         unique_filename = f"{uuid.uuid4()}_{original_filename}"
 
+        # Charge the user's quotas before writing (given back if the upload fails)
+        s3_key = f"{user_id}/{unique_filename}"
+        await asyncio.to_thread(reserve_upload, s3_key, user_id, len(content), info["page_count"])
+
         # Upload to S3
-        result = upload_pdf_to_s3(content, unique_filename, user_id)
+        try:
+            result = await s3.run_sync(upload_pdf_to_s3, content, unique_filename, user_id)
+        except Exception:
+            await asyncio.to_thread(release_uploads, [s3_key])
+            raise
 
         if result['status'] == 'success':
             return {
                 "status": "success",
                 "message": "File uploaded successfully to S3",
                 "s3_key": result['s3_key'],
-                "filename": unique_filename
+                "filename": unique_filename,
+                "page_count": info["page_count"],
+                "size_bytes": len(content)
             }
         else:
+            await asyncio.to_thread(release_uploads, [s3_key])
             return {
                 "status": "error",
                 "message": result.get('error', 'Failed to upload to S3')
             }
 
+    except PDFValidationError as e:
+        print(f"Upload rejected: {e}")
+        return {
+            "status": "error",
+            "message": str(e)
+        }
     except Exception as e:
         print(f"Upload error: {e}")
         import traceback
@@ -306,65 +789,218 @@ async def upload_pdf(file: UploadFile = File(...), user_id: str = Body(...)):
         }
 
 
-@app.post("/process-pdf/")
-async def process_pdf(s3_key: str = Body(..., embed=True), user_id: str = Body(..., embed=True)):
-    """Process a PDF file from S3 and add it to the graph database with connections"""
+async def find_connections(title: str, summary: str, existing_pdfs: List[dict]) -> List[dict]:
+    """
+    Ask the connection agent which existing PDFs relate to a PDF with this title and summary
+
+    Pairs already judged with the same titles, summaries and analysis
+    version come from the connection cache; only unseen pairs are sent to
+    the agent, and its verdicts (including "not related") are cached.
+    """
+    if not existing_pdfs:
+        return []
+
+    new_hash = content_hash({"title": title, "summary": summary})
+    existing_hashes = {pdf["pdf_id"]: content_hash(pdf) for pdf in existing_pdfs}
+    cached = await asyncio.to_thread(get_pairs, new_hash, list(existing_hashes.values()), ANALYSIS_VERSION)
+
+    connections = []
+    unseen = []
+    for pdf in existing_pdfs:
+        verdict = cached.get(existing_hashes[pdf["pdf_id"]])
+        if verdict is None:
+            unseen.append(pdf)
+        elif verdict[0] is not None:
+            connections.append({"pdf_id": pdf["pdf_id"], "relationship_type": verdict[0], "confidence": verdict[1]})
+    print(f"DEBUG - Connection cache: {len(existing_pdfs) - len(unseen)} of {len(existing_pdfs)} pairs cached")
+    if not unseen:
+        return connections
+
+    # Create context for connection analysis
+    context = f"""
+New PDF:
+Title: {title}
+Summary: {summary}
+
+Existing PDFs:
+{json.dumps([{"pdf_id": pdf["pdf_id"], "title": pdf["title"], "summary": pdf["summary"]} for pdf in unseen], indent=2)}
+"""
+
+    # Run connection analysis
+    connection_result = await llm.call(connection_agent.run, context)
+    unseen_ids = {pdf["pdf_id"] for pdf in unseen}
+    judged = {}
+    for conn in connection_result.output.related_pdfs:
+        if conn.get("pdf_id") in unseen_ids:
+            judged.setdefault(conn["pdf_id"], conn)
+    connections.extend(judged.values())
+
+    await asyncio.to_thread(store_pairs, [(
+        new_hash,
+        existing_hashes[pdf["pdf_id"]],
+        judged[pdf["pdf_id"]]["relationship_type"] if pdf["pdf_id"] in judged else None,
+        judged[pdf["pdf_id"]]["confidence"] if pdf["pdf_id"] in judged else 0.0
+    ) for pdf in unseen], ANALYSIS_VERSION)
+    return connections
+
+
+async def load_pdf_text(s3_key: str) -> str:
+    """Get a PDF's text from the local cache, extracting it from S3 on a miss"""
+    text = await asyncio.to_thread(get_cached_text, s3_key)
+    if text is None:
+        pdf_content = await s3.run_sync(download_pdf_from_s3, s3_key)
+        text, _ = await asyncio.to_thread(read_pdf_text, pdf_content)
+        await asyncio.to_thread(cache_text, s3_key, text)
+    return text
+
+
+async def reanalyze_pdf(pdf: dict, library: List[dict]) -> dict:
+    """
+    Re-run analysis for one PDF and replace its summary and edges in place
+
+    Like at ingest time, the PDF is compared against the user's older PDFs
+    (lower pdf_id); the edges it was stored with are dropped and rewritten.
+    Edges stored from newer PDFs to this one are left to those PDFs.
+    """
+    pdf_id = pdf["pdf_id"]
+    text = await load_pdf_text(pdf["filename"])
+
+    result = await llm.call(generator_agent.run, text)
+    pdf_data = result.output
+
+    older_pdfs = [other for other in library if other.get("pdf_id", 0) < pdf_id]
+    connections = await find_connections(pdf_data.title, pdf_data.summary, older_pdfs)
+    older_ids = {other["pdf_id"] for other in older_pdfs}
+    edges = [{
+        "from_id": pdf_id,
+        "to_id": conn["pdf_id"],
+        "relationship_type": conn["relationship_type"],
+        "confidence": conn["confidence"]
+    } for conn in connections if conn.get("pdf_id") in older_ids]
+
+    await helix_write("dropPDFOutEdges", {"pdf_id": pdf_id, "user_id": pdf["user_id"]})
+    record_pdf_edges_dropped(pdf_id, pdf["user_id"])
+    if not await create_pdf_relationships(edges, pdf["user_id"]):
+        # analysis_version is left as it was, so the next /reanalyze/ retries this PDF
+        return {"pdf_id": pdf_id, "status": "error", "message": "Failed to store connections"}
+
+    # Stamp the new version last, once the edges it describes are committed
+    await helix_write("updatePDFAnalysis", {
+        "pdf_id": pdf_id,
+        "user_id": pdf["user_id"],
+        "title": pdf_data.title,
+        "summary": pdf_data.summary,
+        "analysis_version": ANALYSIS_VERSION
+    })
+    # Same local updates as a new PDF: cached lists, mirror title, search index
+    record_pdf_added(pdf_id, pdf_data.title, pdf_data.summary, pdf["user_id"], text)
+
+    return {
+        "pdf_id": pdf_id,
+        "status": "success",
+        "title": pdf_data.title,
+        "connections_found": len(edges)
+    }
+
+
+async def backfill_connections(pdf_id: int, user_id: str) -> bool:
+    """
+    Run the deferred connection analysis for a PDF stored without it
+
+    Returns False if the PDF has to stay queued (analysis or Helix failed).
+    """
+    library = await get_all_pdfs(user_id=user_id)
+    pdf = next((other for other in library if other.get("pdf_id") == pdf_id), None)
+    if pdf is None:
+        return True  # deleted since
+
+    older_pdfs = [other for other in library if other.get("pdf_id", 0) < pdf_id]
+    connections = await find_connections(pdf["title"], pdf["summary"], older_pdfs)
+    older_ids = {other["pdf_id"] for other in older_pdfs}
+    return await create_pdf_relationships([{
+        "from_id": pdf_id,
+        "to_id": conn["pdf_id"],
+        "relationship_type": conn["relationship_type"],
+        "confidence": conn["confidence"]
+    } for conn in connections if conn.get("pdf_id") in older_ids], user_id)
+
+
+async def process_pdf_events(s3_key: str, user_id: str):
+    """
+    Run the PDF processing pipeline, yielding (event, data) as each stage completes
+
+    Stages: downloaded, extracted, summarized, stored, connection (once per
+    committed edge), then done with the full result. Failures end the stream
+    with an error event.
+    """
     try:
-        # Extract text from S3 PDF
-        pdf_text = extract_pdf_text_from_s3(s3_key)
+        # Download and extract text from S3 PDF
+        pdf_content = await s3.run_sync(download_pdf_from_s3, s3_key)
+        yield "downloaded", {"s3_key": s3_key, "size_bytes": len(pdf_content)}
+
+        pdf_text, page_count = await asyncio.to_thread(read_pdf_text, pdf_content)
+        if not pdf_text.strip():
+            raise ValueError("No text could be extracted from the PDF")
+        await asyncio.to_thread(cache_text, s3_key, pdf_text)
+        yield "extracted", {"page_count": page_count}
 
         # Run the agent to analyze the PDF
-        result = await generator_agent.run(pdf_text)
+        result = await llm.call(generator_agent.run, pdf_text)
         pdf_data = result.output
+        yield "summarized", {"title": pdf_data.title, "summary": pdf_data.summary}
 
         # Get all existing PDFs from the database for THIS USER ONLY
-        existing_pdfs = get_all_pdfs(user_id=user_id)
+        existing_pdfs = await get_all_pdfs(user_id=user_id)
         print(f"DEBUG - Existing PDFs for user {user_id}: {existing_pdfs}")
 
-        # Generate a new PDF ID
-        new_pdf_id = max([pdf.get("pdf_id", 0) for pdf in existing_pdfs], default=0) + 1
+        # Generate a new PDF ID. existing_pdfs may be a cached list that has
+        # not seen other workers' uploads yet, so the id comes from the
+        # shared counter rather than from max + 1
+        highest_known = max([pdf.get("pdf_id", 0) for pdf in existing_pdfs], default=0)
+        new_pdf_id = await asyncio.to_thread(worker_sync.allocate_pdf_ids, user_id, 1, highest_known)
         print(f"DEBUG - Generated new PDF ID: {new_pdf_id}")
 
-        # Find connections to existing PDFs using AI
-        connections = []
-        if existing_pdfs:
-            # Create context for connection analysis
-            context = f"""
-New PDF:
-Title: {pdf_data.title}
-Summary: {pdf_data.summary}
-
-Existing PDFs:
-{json.dumps([{"pdf_id": pdf["pdf_id"], "title": pdf["title"], "summary": pdf["summary"]} for pdf in existing_pdfs], indent=2)}
-"""
-
-            # Run connection analysis
-            connection_result = await connection_agent.run(context)
-            connections = connection_result.output.related_pdfs
+        # Find connections to existing PDFs using AI. If connection analysis
+        # is unavailable, the PDF is still stored with its summary and its
+        # edges are backfilled later (see backfill_connections)
+        connections_pending = False
+        try:
+            connections = await find_connections(pdf_data.title, pdf_data.summary, existing_pdfs)
+        except Exception as e:
+            print(f"Connection analysis unavailable, deferring for {s3_key}: {e}")
+            connections = []
+            connections_pending = True
 
         # Add the PDF to the database (s3_key stored as filename)
-        add_success = add_pdf_to_db(
+        add_success = await add_pdf_to_db(
             pdf_id=new_pdf_id,
             title=pdf_data.title,
             summary=pdf_data.summary,
             filename=s3_key,  # Store S3 key instead of filename
-            user_id=user_id
+            user_id=user_id,
+            text=pdf_text
         )
+        if add_success:
+            if connections_pending:
+                await asyncio.to_thread(worker_sync.queue_connection_backfill, new_pdf_id, user_id)
+            yield "stored", {"pdf_id": new_pdf_id}
 
         # Create relationship edges
         created_edges = []
         if add_success and connections:
             for conn in connections:
-                edge_success = create_pdf_relationship(
+                edge_success = await create_pdf_relationship(
                     from_id=new_pdf_id,
                     to_id=conn["pdf_id"],
                     relationship_type=conn["relationship_type"],
-                    confidence=conn["confidence"]
+                    confidence=conn["confidence"],
+                    user_id=user_id
                 )
                 if edge_success:
                     created_edges.append(conn)
+                    yield "connection", conn
 
-        return {
+        yield "done", {
             "status": "success",
             "message": "PDF processed and added to graph database",
             "pdf_id": new_pdf_id,
@@ -372,10 +1008,368 @@ Existing PDFs:
             "summary": pdf_data.summary,
             "s3_key": s3_key,
             "connections_found": len(created_edges),
-            "connections": created_edges
+            "connections": created_edges,
+            "connections_pending": connections_pending
         }
 
     except Exception as e:
+        yield "error", {
+            "status": "error",
+            "message": str(e)
+        }
+
+
+@app.post("/process-pdf/")
+async def process_pdf(s3_key: str = Body(..., embed=True), user_id: str = Body(..., embed=True)):
+    """Process a PDF file from S3 and add it to the graph database with connections"""
+    async for event, data in process_pdf_events(s3_key, user_id):
+        if event in ("done", "error"):
+            return data
+
+
+@app.post("/process-pdf/stream")
+async def process_pdf_stream(s3_key: str = Body(..., embed=True), user_id: str = Body(..., embed=True)):
+    """
+    Same as /process-pdf/, streaming each stage as a server-sent event
+
+    The pipeline runs as a background task feeding a queue, so a client
+    that disconnects mid-stream only stops the stream, not the processing.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def run_pipeline():
+        try:
+            async for event, data in process_pdf_events(s3_key, user_id):
+                queue.put_nowait((event, data))
+        finally:
+            queue.put_nowait(None)
+
+    run_in_background(run_pipeline())
+
+    async def event_stream():
+        while True:
+            item = await queue.get()
+            if item is None:
+                break
+            event, data = item
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.post("/process-batch/")
+async def process_batch(s3_keys: List[str] = Body(..., embed=True), user_id: str = Body(..., embed=True)):
+    """
+    Process many PDFs from S3 at once
+
+    Files are extracted and summarized in parallel, then a single connection
+    analysis covers pairs within the batch and batch-to-library. Nodes and
+    edges are committed with one bulk query each.
+    """
+    try:
+        semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+        async def analyze(s3_key: str) -> dict:
+            async with semaphore:
+                try:
+                    pdf_text = await load_pdf_text(s3_key)
+                    if not pdf_text.strip():
+                        raise ValueError("No text could be extracted from the PDF")
+                    result = await llm.call(generator_agent.run, pdf_text)
+                    return {"s3_key": s3_key, "text": pdf_text, "data": result.output}
+                except Exception as e:
+                    print(f"Error analyzing {s3_key}: {e}")
+                    return {"s3_key": s3_key, "error": str(e)}
+
+        analyzed = await asyncio.gather(*[analyze(s3_key) for s3_key in s3_keys])
+        succeeded = [item for item in analyzed if "data" in item]
+        failed = [{"s3_key": item["s3_key"], "status": "error", "message": item["error"]}
+                  for item in analyzed if "error" in item]
+
+        if not succeeded:
+            return {
+                "status": "error",
+                "message": "No PDFs in the batch could be processed",
+                "results": failed
+            }
+
+        # Assign IDs in batch order, after the user's existing PDFs (from the
+        # shared counter, as in process_pdf_events)
+        existing_pdfs = await get_all_pdfs(user_id=user_id)
+        highest_known = max([pdf.get("pdf_id", 0) for pdf in existing_pdfs], default=0)
+        next_id = await asyncio.to_thread(worker_sync.allocate_pdf_ids, user_id, len(succeeded), highest_known)
+        new_pdfs = [{
+            "pdf_id": next_id + i,
+            "title": item["data"].title,
+            "summary": item["data"].summary,
+            "filename": item["s3_key"],  # Store S3 key instead of filename
+            "text": item["text"]
+        } for i, item in enumerate(succeeded)]
+
+        # Pairs judged before (same titles, summaries and analysis version)
+        # come from the connection cache; only new PDFs with unseen pairs go
+        # to the agent
+        hashes = {pdf["pdf_id"]: content_hash(pdf) for pdf in new_pdfs + existing_pdfs}
+        older = {pdf["pdf_id"]: existing_pdfs + [other for other in new_pdfs if other["pdf_id"] < pdf["pdf_id"]]
+                 for pdf in new_pdfs}
+        edges = {}
+        pending = []
+        for pdf in new_pdfs:
+            cached = await asyncio.to_thread(
+                get_pairs, hashes[pdf["pdf_id"]], [hashes[other["pdf_id"]] for other in older[pdf["pdf_id"]]], ANALYSIS_VERSION
+            )
+            if any(hashes[other["pdf_id"]] not in cached for other in older[pdf["pdf_id"]]):
+                pending.append(pdf)
+                continue
+            for other in older[pdf["pdf_id"]]:
+                relationship_type, confidence = cached[hashes[other["pdf_id"]]]
+                if relationship_type is not None:
+                    edges.setdefault((pdf["pdf_id"], other["pdf_id"], relationship_type), {
+                        "from_id": pdf["pdf_id"],
+                        "to_id": other["pdf_id"],
+                        "relationship_type": relationship_type,
+                        "confidence": confidence
+                    })
+        print(f"DEBUG - Connection cache: {len(new_pdfs) - len(pending)} of {len(new_pdfs)} new PDFs fully cached")
+
+        # One connection analysis for the rest of the batch (backfilled per PDF if unavailable)
+        connections = []
+        connections_pending = False
+        pending_ids = {pdf["pdf_id"] for pdf in pending}
+        if pending:
+            context = f"""
+New PDFs:
+{json.dumps([{"pdf_id": pdf["pdf_id"], "title": pdf["title"], "summary": pdf["summary"]} for pdf in pending], indent=2)}
+
+Existing PDFs:
+{json.dumps([{"pdf_id": pdf["pdf_id"], "title": pdf["title"], "summary": pdf["summary"]} for pdf in existing_pdfs + [other for other in new_pdfs if other["pdf_id"] not in pending_ids]], indent=2)}
+"""
+            try:
+                connection_result = await llm.call(batch_connection_agent.run, context)
+                connections = connection_result.output.related_pairs
+            except Exception as e:
+                print(f"Batch connection analysis unavailable, deferring: {e}")
+                connections_pending = True
+
+        # Keep well-formed pairs, stored from the newer PDF to the older one
+        known_ids = set(hashes)
+        judged = {}
+        for conn in connections:
+            from_id, to_id = conn.get("from_id"), conn.get("to_id")
+            if from_id not in known_ids or to_id not in known_ids or from_id == to_id:
+                continue
+            if from_id < to_id:
+                # Flipping a directed relationship would invert its meaning
+                if conn.get("relationship_type") in DIRECTED_RELATIONSHIP_TYPES:
+                    continue
+                from_id, to_id = to_id, from_id
+            if from_id not in pending_ids:
+                continue
+            edge = edges.setdefault((from_id, to_id, conn.get("relationship_type")), {
+                "from_id": from_id,
+                "to_id": to_id,
+                "relationship_type": conn.get("relationship_type"),
+                "confidence": conn.get("confidence")
+            })
+            best = judged.get((from_id, to_id))
+            if best is None or (edge["confidence"] or 0.0) > (best["confidence"] or 0.0):
+                judged[(from_id, to_id)] = edge
+
+        # Cache the verdict on every pair the agent was asked about (strongest
+        # relationship per pair, or "not related")
+        if pending and not connections_pending:
+            await asyncio.to_thread(store_pairs, [(
+                hashes[pdf["pdf_id"]],
+                hashes[other["pdf_id"]],
+                judged[(pdf["pdf_id"], other["pdf_id"])]["relationship_type"] if (pdf["pdf_id"], other["pdf_id"]) in judged else None,
+                judged[(pdf["pdf_id"], other["pdf_id"])]["confidence"] if (pdf["pdf_id"], other["pdf_id"]) in judged else 0.0
+            ) for pdf in pending for other in older[pdf["pdf_id"]]], ANALYSIS_VERSION)
+        edges = list(edges.values())
+
+        if not await add_pdfs_to_db(new_pdfs, user_id):
+            return {
+                "status": "error",
+                "message": "Failed to add PDFs to database",
+                "results": failed
+            }
+        edges_created = await create_pdf_relationships(edges, user_id)
+        if connections_pending:
+            for pdf in pending:
+                await asyncio.to_thread(worker_sync.queue_connection_backfill, pdf["pdf_id"], user_id)
+
+        results = [{
+            "s3_key": pdf["filename"],
+            "status": "success",
+            "pdf_id": pdf["pdf_id"],
+            "title": pdf["title"],
+            "summary": pdf["summary"],
+            "connections": [edge for edge in edges if pdf["pdf_id"] in (edge["from_id"], edge["to_id"])] if edges_created else [],
+            "connections_pending": connections_pending and pdf["pdf_id"] in pending_ids
+        } for pdf in new_pdfs]
+
+        return {
+            "status": "success",
+            "message": f"Processed {len(new_pdfs)} of {len(s3_keys)} PDFs",
+            "processed": len(new_pdfs),
+            "failed": len(failed),
+            "connections_found": len(edges) if edges_created else 0,
+            "results": results + failed
+        }
+
+    except Exception as e:
+        print(f"Error in batch processing: {e}")
+        import traceback
+        traceback.print_exc()
+        return {
+            "status": "error",
+            "message": str(e)
+        }
+
+
+@app.post("/reanalyze/")
+async def reanalyze_pdfs(
+    user_id: Optional[str] = Body(None, embed=True),
+    dry_run: bool = Body(False, embed=True),
+    background: bool = Body(False, embed=True)
+):
+    """
+    Re-analyse PDFs whose analysis_version differs from the current one
+
+    Only stale PDFs are processed (at most REANALYZE_CONCURRENCY at once),
+    using cached extracted text where available. Summaries and edges are
+    replaced in place. With background=true the call returns a job_id at
+    once; poll GET /jobs/{job_id} (served by any worker) for the result.
+    """
+    if background and not dry_run:
+        job_id = await asyncio.to_thread(worker_sync.create_job, "reanalyze")
+
+        async def run_job():
+            result = await reanalyze_stale_pdfs(user_id)
+            await asyncio.to_thread(worker_sync.set_job, job_id, "reanalyze", result["status"], result)
+
+        run_in_background(run_job())
+        return {"status": "success", "job_id": job_id}
+
+    return await reanalyze_stale_pdfs(user_id, dry_run)
+
+
+async def reanalyze_stale_pdfs(user_id: Optional[str], dry_run: bool = False) -> dict:
+    try:
+        all_pdfs = await get_all_pdfs(user_id=user_id)
+        stale = [pdf for pdf in all_pdfs if pdf.get("analysis_version") != ANALYSIS_VERSION]
+        print(f"DEBUG - {len(stale)} of {len(all_pdfs)} PDFs are stale (current version {ANALYSIS_VERSION})")
+
+        if dry_run:
+            return {
+                "status": "success",
+                "analysis_version": ANALYSIS_VERSION,
+                "stale": [{"pdf_id": pdf["pdf_id"], "user_id": pdf.get("user_id"), "analysis_version": pdf.get("analysis_version")} for pdf in stale]
+            }
+
+        # Each PDF is compared against its own user's library
+        libraries = {}
+        for pdf in all_pdfs:
+            libraries.setdefault(pdf.get("user_id"), []).append(pdf)
+
+        semaphore = asyncio.Semaphore(REANALYZE_CONCURRENCY)
+
+        async def run(pdf: dict) -> dict:
+            async with semaphore:
+                try:
+                    return await reanalyze_pdf(pdf, libraries[pdf.get("user_id")])
+                except Exception as e:
+                    print(f"Error re-analysing PDF {pdf['pdf_id']}: {e}")
+                    return {"pdf_id": pdf["pdf_id"], "status": "error", "message": str(e)}
+
+        results = await asyncio.gather(*[run(pdf) for pdf in stale])
+
+        return {
+            "status": "success",
+            "analysis_version": ANALYSIS_VERSION,
+            "reanalyzed": sum(1 for result in results if result["status"] == "success"),
+            "failed": sum(1 for result in results if result["status"] == "error"),
+            "results": results
+        }
+
+    except Exception as e:
+        print(f"Error in reanalysis: {e}")
+        import traceback
+        traceback.print_exc()
+        return {
+            "status": "error",
+            "message": str(e)
+        }
+
+
+@app.get("/usage/")
+async def get_user_usage(user_id: str):
+    """Get a user's uploaded bytes and pages against their quotas"""
+    try:
+        return {"status": "success", "usage": await asyncio.to_thread(get_usage, user_id)}
+    except Exception as e:
+        print(f"Error getting usage: {e}")
+        return {
+            "status": "error",
+            "message": str(e)
+        }
+
+
+@app.get("/health")
+async def health():
+    """Circuit breaker state of each backend dependency in this worker"""
+    dependencies = {dependency.name: dependency.stats() for dependency in (helix, s3, llm)}
+    return {
+        "status": "ok" if all(dep["state"] == "closed" for dep in dependencies.values()) else "degraded",
+        "dependencies": dependencies
+    }
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Get the status (running, success, error) and result of a background job"""
+    job = await asyncio.to_thread(worker_sync.get_job, job_id)
+    if job is None:
+        return {
+            "status": "error",
+            "message": "Job not found"
+        }
+    return {"status": "success", "job": job}
+
+
+@app.get("/graph/")
+async def get_graph(user_id: str):
+    """Get a user's graph with precomputed 3D positions and topic clusters"""
+    try:
+        pdfs = await get_all_pdfs(user_id=user_id)
+        pdf_ids = {pdf["pdf_id"] for pdf in pdfs}
+        edges = [edge for edge in await get_user_edges(user_id, pdf_ids)
+                 if edge["from_id"] in pdf_ids and edge["to_id"] in pdf_ids]
+        layout = await get_user_layout(user_id, pdfs, edges)
+
+        nodes = []
+        for pdf in pdfs:
+            x, y, z = layout.positions[pdf["pdf_id"]]
+            nodes.append({**pdf, "x": x, "y": y, "z": z, "cluster": layout.clusters[pdf["pdf_id"]]})
+
+        return {
+            "status": "success",
+            "nodes": nodes,
+            "links": [{
+                "source": edge["from_id"],
+                "target": edge["to_id"],
+                "relationship_type": edge["relationship_type"],
+                "confidence": edge["confidence"]
+            } for edge in edges],
+            "cluster_count": len(set(layout.clusters.values()))
+        }
+    except Exception as e:
+        print(f"Error building graph: {e}")
+        import traceback
+        traceback.print_exc()
         return {
             "status": "error",
             "message": str(e)
@@ -383,10 +1377,12 @@ Existing PDFs:
 
 
 @app.get("/pdfs/")
-async def get_pdfs():
-    """Get all PDFs in the database"""
+async def get_pdfs(request: Request, response: Response, user_id: Optional[str] = None):
+    """Get all PDFs in the database, optionally only those of one user"""
     try:
-        pdfs = get_all_pdfs()
+        pdfs = await get_all_pdfs(user_id=user_id)
+        if not_modified(request, response, pdfs_key(user_id)):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": response.headers["ETag"]})
         return {
             "status": "success",
             "count": len(pdfs),
@@ -399,23 +1395,36 @@ async def get_pdfs():
         }
 
 
+@app.get("/search")
+async def search_pdfs(q: str, user_id: str, limit: int = 10, prefix: bool = True):
+    """Full-text search over a user's PDF titles and summaries (BM25, prefix matching on the last word)"""
+    try:
+        results = search_index.search(q, user_id=user_id, limit=max(limit, 1), prefix=prefix)
+        return {
+            "status": "success",
+            "query": q,
+            "count": len(results),
+            "results": results
+        }
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": str(e)
+        }
+
+
 @app.get("/pdf/{pdf_id}/connections")
-async def get_pdf_connections(pdf_id: int):
+async def get_pdf_connections(pdf_id: int, request: Request, response: Response):
     """Get all connections for a specific PDF"""
     try:
-        connections = db.query("getRelatedPDFs", {"pdf_id": pdf_id})
-        print(f"DEBUG - Raw connections result: {connections}")
-
-        # Handle the nested structure returned by Helix
-        if isinstance(connections, list) and len(connections) > 0:
-            # Check if result is wrapped in a 'related' key
-            if isinstance(connections[0], dict) and 'related' in connections[0]:
-                connections = connections[0]['related']
+        connections = await get_related_pdfs(pdf_id)
+        if not_modified(request, response, related_key(pdf_id)):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": response.headers["ETag"]})
 
         return {
             "status": "success",
             "pdf_id": pdf_id,
-            "connections": connections if isinstance(connections, list) else []
+            "connections": connections
         }
     except Exception as e:
         print(f"Error getting connections: {e}")
@@ -427,12 +1436,79 @@ async def get_pdf_connections(pdf_id: int):
         }
 
 
+@app.get("/pdf/{pdf_id}/neighborhood")
+async def get_pdf_neighborhood(pdf_id: int, user_id: str, hops: int = 1, relationship_type: Optional[str] = None, min_confidence: float = 0.0):
+    """Get PDFs within a number of hops, served from the in-memory graph mirror"""
+    try:
+        if not graph_mirror.loaded:
+            return {
+                "status": "error",
+                "message": "Graph mirror is not enabled (set GRAPH_MIRROR_ENABLED=true)"
+            }
+
+        if not graph_mirror.has_node(pdf_id, user_id):
+            return {
+                "status": "error",
+                "message": f"PDF with id {pdf_id} not found"
+            }
+
+        neighbors = graph_mirror.k_hop(pdf_id, user_id, max(hops, 1), relationship_type, min_confidence)
+        return {
+            "status": "success",
+            "pdf_id": pdf_id,
+            "hops": max(hops, 1),
+            "degree": graph_mirror.degree(pdf_id, user_id),
+            "neighbors": neighbors
+        }
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": str(e)
+        }
+
+
+@app.get("/pdf/{pdf_id}/traverse")
+async def get_pdf_traversal(pdf_id: int, user_id: str, relationship_type: Optional[str] = "prerequisite", depth: int = 3, min_confidence: float = 0.6, top_k: int = 10):
+    """Follow relationships from one of a user's PDFs (by default its prerequisite chain) inside Helix"""
+    try:
+        if not 1 <= depth <= MAX_TRAVERSAL_DEPTH:
+            return {
+                "status": "error",
+                "message": f"depth must be between 1 and {MAX_TRAVERSAL_DEPTH}"
+            }
+
+        reached = await traverse_related(pdf_id, user_id, relationship_type, depth, min_confidence, max(top_k, 1))
+
+        response = {
+            "status": "success",
+            "pdf_id": pdf_id,
+            "relationship_type": relationship_type,
+            "depth": depth,
+            "results": reached
+        }
+
+        # Deepest prerequisites should be read first, the requested PDF last
+        if relationship_type == "prerequisite":
+            ordered = sorted(reached, key=lambda pdf: pdf["depth"], reverse=True)
+            response["reading_order"] = [pdf["pdf_id"] for pdf in ordered] + [pdf_id]
+
+        return response
+    except Exception as e:
+        print(f"Error traversing from PDF: {e}")
+        import traceback
+        traceback.print_exc()
+        return {
+            "status": "error",
+            "message": str(e)
+        }
+
+
 @app.delete("/pdf/{pdf_id}")
 async def delete_pdf(pdf_id: int, user_id: str = Body(..., embed=True)):
     """Delete a PDF from S3 and database"""
     try:
         # Get PDF details before deletion (to get S3 key)
-        all_pdfs = get_all_pdfs(user_id=user_id)
+        all_pdfs = await get_all_pdfs(user_id=user_id)
         pdf_to_delete = next((pdf for pdf in all_pdfs if pdf.get("pdf_id") == pdf_id), None)
 
         if not pdf_to_delete:
@@ -442,7 +1518,7 @@ async def delete_pdf(pdf_id: int, user_id: str = Body(..., embed=True)):
             }
 
         # Delete from database first
-        delete_success = delete_pdf_from_db(pdf_id, user_id)
+        delete_success = await delete_pdf_from_db(pdf_id, user_id)
 
         if not delete_success:
             return {
@@ -454,7 +1530,10 @@ async def delete_pdf(pdf_id: int, user_id: str = Body(..., embed=True)):
         s3_deleted = False
         if "filename" in pdf_to_delete:
             s3_key = pdf_to_delete["filename"]
-            s3_deleted = delete_pdf_from_s3(s3_key)
+            s3_deleted = await s3.run_sync(delete_pdf_from_s3, s3_key)
+            delete_cached_text(s3_key)
+            if s3_deleted:
+                await asyncio.to_thread(release_uploads, [s3_key])
 
         return {
             "status": "success",
@@ -473,12 +1552,69 @@ async def delete_pdf(pdf_id: int, user_id: str = Body(..., embed=True)):
         }
 
 
+@app.post("/pdfs/delete")
+async def delete_pdfs(pdf_ids: List[int] = Body(..., embed=True), user_id: str = Body(..., embed=True)):
+    """Delete many PDFs from S3 and database, returning a result per PDF"""
+    try:
+        # One ownership check for every ID
+        owned = {pdf.get("pdf_id"): pdf for pdf in await get_all_pdfs(user_id=user_id)}
+        requested = list(dict.fromkeys(pdf_ids))
+        to_delete = [pdf_id for pdf_id in requested if pdf_id in owned]
+
+        results = {
+            pdf_id: {
+                "pdf_id": pdf_id,
+                "status": "error",
+                "message": f"PDF with id {pdf_id} not found or doesn't belong to user {user_id}"
+            }
+            for pdf_id in requested if pdf_id not in owned
+        }
+
+        if to_delete:
+            # Delete from database first
+            if not await delete_pdfs_from_db(to_delete, user_id):
+                for pdf_id in to_delete:
+                    results[pdf_id] = {
+                        "pdf_id": pdf_id,
+                        "status": "error",
+                        "message": "Failed to delete PDF from database"
+                    }
+            else:
+                # Delete from S3 (filename is the S3 key)
+                s3_keys = [owned[pdf_id]["filename"] for pdf_id in to_delete if owned[pdf_id].get("filename")]
+                s3_results = await s3.run_sync(delete_pdfs_from_s3, s3_keys) if s3_keys else {}
+                for s3_key in s3_keys:
+                    delete_cached_text(s3_key)
+                await asyncio.to_thread(release_uploads, [s3_key for s3_key in s3_keys if s3_results.get(s3_key)])
+                for pdf_id in to_delete:
+                    results[pdf_id] = {
+                        "pdf_id": pdf_id,
+                        "status": "success",
+                        "s3_deleted": s3_results.get(owned[pdf_id].get("filename"), False)
+                    }
+
+        return {
+            "status": "success",
+            "deleted": sum(1 for result in results.values() if result["status"] == "success"),
+            "results": [results[pdf_id] for pdf_id in requested]
+        }
+
+    except Exception as e:
+        print(f"Error in bulk delete endpoint: {e}")
+        import traceback
+        traceback.print_exc()
+        return {
+            "status": "error",
+            "message": str(e)
+        }
+
+
 @app.get("/pdf/{pdf_id}/download-url")
 async def get_pdf_download_url(pdf_id: int, user_id: str):
     """Generate a presigned URL for downloading a PDF"""
     try:
         # Verify ownership
-        all_pdfs = get_all_pdfs(user_id=user_id)
+        all_pdfs = await get_all_pdfs(user_id=user_id)
         pdf = next((p for p in all_pdfs if p.get("pdf_id") == pdf_id), None)
 
         if not pdf:
@@ -505,5 +1641,8 @@ async def get_pdf_download_url(pdf_id: int, user_id: str):
 
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000) 
+    # One worker per CPU core by default (WEB_CONCURRENCY); workers re-import
+    # this module, so the app is passed by import string
+    os.environ["WEB_CONCURRENCY"] = str(WEB_CONCURRENCY)
+    uvicorn.run("main:app", host="0.0.0.0", port=8000, workers=WEB_CONCURRENCY) 
 
@@ -0,0 +1,95 @@
+"""
+Single Edge Migration Script
+
+One-time migration that collapses the duplicated forward/reverse RelatedTo
+edges written by older versions of create_pdf_relationship. For every pair
+of PDFs and relationship type, one edge is kept (pdf_ids are allocated per
+user, so a pair is only a duplicate within the same user's graph):
+1. The edge from the newer PDF (higher pdf_id) to the older one, which is
+   the direction the relationship was originally judged in
+2. Otherwise the first edge seen
+
+All other edges of the group are dropped.
+"""
+
+from collections import defaultdict
+from typing import Dict, List
+
+from helix_utils import query_helix_sync
+from graph_mirror import parse_relationship_rows
+
+
+def get_all_relationships() -> List[dict]:
+    """Get every RelatedTo edge with its Helix edge id."""
+    return parse_relationship_rows(query_helix_sync("getAllRelationships", {}))
+
+
+def find_duplicate_edges(edges: List[dict]) -> List[dict]:
+    """Return the edges to drop so each relationship is stored once."""
+    groups: Dict[tuple, List[dict]] = defaultdict(list)
+    for edge in edges:
+        pair = (min(edge["from_id"], edge["to_id"]), max(edge["from_id"], edge["to_id"]))
+        groups[(edge.get("user_id"), pair, edge["relationship_type"])].append(edge)
+
+    to_drop = []
+    for group in groups.values():
+        if len(group) < 2:
+            continue
+        keep = next((e for e in group if e["from_id"] > e["to_id"]), group[0])
+        to_drop.extend(e for e in group if e is not keep)
+    return to_drop
+
+
+def migrate(dry_run: bool = False) -> Dict:
+    """Collapse duplicate edges; returns counts of what was (or would be) dropped."""
+    edges = get_all_relationships()
+    to_drop = find_duplicate_edges(edges)
+
+    print(f"📊 Edges found: {len(edges)}")
+    print(f"🔁 Duplicate edges to drop: {len(to_drop)}")
+
+    results = {"total_edges": len(edges), "dropped": 0, "failed": []}
+    if dry_run:
+        print("Dry run - nothing was changed")
+        return results
+
+    for edge in to_drop:
+        if edge.get("edge_id") is None:
+            results["failed"].append({"edge": edge, "error": "missing edge_id"})
+            continue
+        try:
+            query_helix_sync("dropRelationship", {"edge_id": edge["edge_id"]}, retry_reads=False)
+            results["dropped"] += 1
+        except Exception as e:
+            results["failed"].append({"edge": edge, "error": str(e)})
+
+    print(f"✅ Dropped: {results['dropped']}")
+    if results["failed"]:
+        print(f"❌ Failed: {len(results['failed'])}")
+        for item in results["failed"]:
+            edge = item["edge"]
+            print(f"   • {edge.get('user_id')}: {edge['from_id']} -> {edge['to_id']} ({edge['relationship_type']}): {item['error']}")
+
+    return results
+
+
+def main():
+    """Main entry point."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Collapse duplicated RelatedTo edges to a single edge per relationship")
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only report how many edges would be dropped"
+    )
+
+    args = parser.parse_args()
+
+    print("🚀 RelatedTo single edge migration")
+    print("=" * 60)
+    migrate(dry_run=args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+PDF Validation Module
+Cheap checks run at upload time, before anything is written to S3 or sent
+to the LLM: size cap and magic bytes while streaming the upload, then
+encryption, page count and text layer from the PDF's trailer and page
+tree, plus per-user byte and page quotas kept in a local SQLite ledger
+"""
+
+import io
+import os
+import sqlite3
+import threading
+import time
+from typing import List
+
+import PyPDF2
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Validation Configuration from environment variables
+MAX_UPLOAD_BYTES = int(os.getenv('MAX_UPLOAD_BYTES', 50 * 1024 * 1024))  # 50 MB default
+MAX_PDF_PAGES = int(os.getenv('MAX_PDF_PAGES', 500))
+PDF_REQUIRE_TEXT_LAYER = os.getenv('PDF_REQUIRE_TEXT_LAYER', 'true').lower() == 'true'
+USER_QUOTA_BYTES = int(os.getenv('USER_QUOTA_BYTES', 1024 * 1024 * 1024))  # 1 GB per user, 0 = unlimited
+USER_QUOTA_PAGES = int(os.getenv('USER_QUOTA_PAGES', 10000))             # 0 = unlimited
+UPLOAD_LEDGER_DB = os.getenv('UPLOAD_LEDGER_DB', 'upload_ledger.db')
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+TEXT_SAMPLE_PAGES = 3  # pages inspected for a text layer
+PDF_MAGIC = b'%PDF-'
+PDF_HEADER_WINDOW = 1024  # the header may be preceded by junk bytes
+
+
+class PDFValidationError(Exception):
+    """Raised when an upload is not an acceptable PDF or exceeds a limit"""
+
+
+async def read_upload(file) -> bytes:
+    """
+    Read an UploadFile in chunks, rejecting it as soon as it is clearly bad
+
+    The magic bytes are checked on the first chunk and the size cap is
+    enforced while reading, so non-PDF and oversized uploads are rejected
+    without being copied into memory in full (the request body itself has
+    already been received and spooled by Starlette at this point).
+    """
+    chunks = []
+    size = 0
+    while True:
+        chunk = await file.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        if not chunks and PDF_MAGIC not in chunk[:PDF_HEADER_WINDOW]:
+            raise PDFValidationError("File is not a PDF")
+        size += len(chunk)
+        if size > MAX_UPLOAD_BYTES:
+            raise PDFValidationError(f"File is larger than {MAX_UPLOAD_BYTES // (1024 * 1024)} MB")
+        chunks.append(chunk)
+
+    if not chunks:
+        raise PDFValidationError("File is empty")
+    return b"".join(chunks)
+
+
+def _has_fonts(page) -> bool:
+    resources = page.get("/Resources")
+    if resources is None:
+        return False
+    resources = resources.get_object()
+    fonts = resources.get("/Font")
+    return fonts is not None and len(fonts.get_object()) > 0
+
+
+def _sample_pages(page_count: int) -> List[int]:
+    if page_count <= TEXT_SAMPLE_PAGES:
+        return list(range(page_count))
+    step = page_count / TEXT_SAMPLE_PAGES
+    return [int(i * step) for i in range(TEXT_SAMPLE_PAGES)]
+
+
+def inspect_pdf(content: bytes) -> dict:
+    """
+    Read a PDF's trailer and page tree without extracting its text
+
+    Only the cross-reference table, the page count from the page tree and a
+    few sampled pages are parsed. A page with no font resources cannot carry
+    a text layer (scanned/image-only pages); text extraction is attempted on
+    the sampled pages only if none of them declare fonts directly, since
+    fonts can also be inherited.
+
+    Raises:
+        PDFValidationError: The PDF is corrupt, password-protected,
+            has too many pages, or (if PDF_REQUIRE_TEXT_LAYER) no text layer
+
+    Returns:
+        dict: page_count, has_text_layer
+    """
+    if b'%%EOF' not in content[-PDF_HEADER_WINDOW:]:
+        raise PDFValidationError("PDF is truncated (no end-of-file marker)")
+
+    try:
+        reader = PyPDF2.PdfReader(io.BytesIO(content), strict=False)
+        if reader.is_encrypted:
+            # Owner-password-only PDFs open with an empty user password
+            try:
+                decrypted = reader.decrypt("")
+            except Exception:
+                decrypted = 0
+            if not decrypted:
+                raise PDFValidationError("PDF is password-protected")
+        page_count = len(reader.pages)
+        samples = [reader.pages[i] for i in _sample_pages(page_count)]
+        has_text_layer = any(_has_fonts(page) for page in samples)
+        if not has_text_layer:
+            has_text_layer = any((page.extract_text() or "").strip() for page in samples)
+    except PDFValidationError:
+        raise
+    except Exception as e:
+        raise PDFValidationError(f"PDF could not be read: {e}")
+
+    if page_count == 0:
+        raise PDFValidationError("PDF has no pages")
+    if page_count > MAX_PDF_PAGES:
+        raise PDFValidationError(f"PDF has {page_count} pages (limit {MAX_PDF_PAGES})")
+    if PDF_REQUIRE_TEXT_LAYER and not has_text_layer:
+        raise PDFValidationError("PDF has no text layer (scanned or image-only PDFs are not supported)")
+
+    return {"page_count": page_count, "has_text_layer": has_text_layer}
+
+
+# ---------- per-user quotas ----------
+
+# One connection per thread: callers run in asyncio.to_thread, and a shared
+# connection would interleave their transactions
+_local = threading.local()
+
+
+def _get_connection() -> sqlite3.Connection:
+    """Per-thread connection (connections must not cross a fork or a thread)"""
+    if getattr(_local, "pid", None) != os.getpid():
+        connection = sqlite3.connect(UPLOAD_LEDGER_DB, timeout=5, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS uploads (
+                s3_key TEXT PRIMARY KEY,
+                user_id TEXT NOT NULL,
+                bytes INTEGER NOT NULL,
+                pages INTEGER NOT NULL,
+                created REAL NOT NULL
+            )
+        """)
+        connection.execute("CREATE INDEX IF NOT EXISTS uploads_user ON uploads (user_id)")
+        _local.connection = connection
+        _local.pid = os.getpid()
+    return _local.connection
+
+
+def reserve_upload(s3_key: str, user_id: str, size_bytes: int, pages: int) -> None:
+    """
+    Check the user's quotas and record the upload, atomically
+
+    Raises:
+        PDFValidationError: The upload would exceed the user's byte or page quota
+    """
+    connection = _get_connection()
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        used_bytes, used_pages = connection.execute(
+            "SELECT COALESCE(SUM(bytes), 0), COALESCE(SUM(pages), 0) FROM uploads WHERE user_id = ?",
+            (user_id,)
+        ).fetchone()
+        if USER_QUOTA_BYTES and used_bytes + size_bytes > USER_QUOTA_BYTES:
+            raise PDFValidationError(f"Storage quota exceeded ({used_bytes} of {USER_QUOTA_BYTES} bytes used)")
+        if USER_QUOTA_PAGES and used_pages + pages > USER_QUOTA_PAGES:
+            raise PDFValidationError(f"Page quota exceeded ({used_pages} of {USER_QUOTA_PAGES} pages used)")
+        connection.execute(
+            "INSERT OR REPLACE INTO uploads (s3_key, user_id, bytes, pages, created) VALUES (?, ?, ?, ?, ?)",
+            (s3_key, user_id, size_bytes, pages, time.time())
+        )
+        connection.execute("COMMIT")
+    except Exception:
+        connection.execute("ROLLBACK")
+        raise
+
+
+def release_uploads(s3_keys: List[str]) -> None:
+    """Give the quota used by these uploads back (failed upload or deleted PDF)"""
+    _get_connection().executemany("DELETE FROM uploads WHERE s3_key = ?", [(s3_key,) for s3_key in s3_keys])
+
+
+def get_usage(user_id: str) -> dict:
+    used_bytes, used_pages = _get_connection().execute(
+        "SELECT COALESCE(SUM(bytes), 0), COALESCE(SUM(pages), 0) FROM uploads WHERE user_id = ?",
+        (user_id,)
+    ).fetchone()
+    return {
+        "bytes": used_bytes,
+        "pages": used_pages,
+        "quota_bytes": USER_QUOTA_BYTES,
+        "quota_pages": USER_QUOTA_PAGES
+    }
@@ -0,0 +1,81 @@
+"""
+PDF Re-analysis Script
+
+Asks the FastAPI server to refresh PDFs that were analysed with an older
+model or prompt version. The server:
+1. Finds PDFs whose analysis_version differs from the current one
+2. Reuses cached extracted text (downloads from S3 only on a miss)
+3. Re-runs summarization and connection analysis with bounded concurrency
+4. Replaces summaries and edges in place
+"""
+
+import requests
+
+# Configuration
+API_BASE_URL = "http://localhost:8000"
+
+
+def reanalyze(user_id: str = None, dry_run: bool = False) -> dict:
+    """Trigger re-analysis of stale PDFs and print a summary."""
+    response = requests.post(
+        f"{API_BASE_URL}/reanalyze/",
+        json={"user_id": user_id, "dry_run": dry_run},
+        timeout=None  # re-analysis of a large library can take a long time
+    )
+    response.raise_for_status()
+    result = response.json()
+
+    if result.get("status") != "success":
+        print(f"❌ Re-analysis failed: {result.get('message')}")
+        return result
+
+    print(f"Current analysis version: {result['analysis_version']}")
+
+    if dry_run:
+        print(f"🔎 Stale PDFs: {len(result['stale'])}")
+        for pdf in result["stale"]:
+            print(f"   • ID: {pdf['pdf_id']} (user {pdf['user_id']}, version {pdf['analysis_version']})")
+        return result
+
+    print(f"✅ Re-analysed: {result['reanalyzed']}")
+    print(f"❌ Failed: {result['failed']}")
+    for item in result["results"]:
+        if item["status"] == "error":
+            print(f"   • ID: {item['pdf_id']}: {item.get('message')}")
+
+    return result
+
+
+def main():
+    """Main entry point."""
+    global API_BASE_URL
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Re-analyse PDFs produced by an older model or prompt version")
+    parser.add_argument(
+        "--user-id",
+        default=None,
+        help="Only re-analyse this user's PDFs (default: all users)"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only list stale PDFs"
+    )
+    parser.add_argument(
+        "--url",
+        default=API_BASE_URL,
+        help=f"FastAPI server URL (default: {API_BASE_URL})"
+    )
+
+    args = parser.parse_args()
+
+    API_BASE_URL = args.url
+
+    print("🔄 PDF Re-analysis")
+    print("=" * 60)
+    reanalyze(args.user_id, args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Dependency Resilience Module
+Deadlines, bulkheads (concurrency limits) and circuit breakers for calls
+to backend dependencies (Helix, S3, the LLM), so a slow or failing backend
+fails fast instead of tying up the server
+"""
+
+import asyncio
+import functools
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Resilience Configuration from environment variables
+BREAKER_FAILURE_THRESHOLD = int(os.getenv('BREAKER_FAILURE_THRESHOLD', 5))  # consecutive failures before opening
+BREAKER_RESET_TIMEOUT = float(os.getenv('BREAKER_RESET_TIMEOUT', 30.0))     # seconds open before a trial call
+BULKHEAD_WAIT = float(os.getenv('BULKHEAD_WAIT', 5.0))                      # seconds to wait for a free slot
+
+
+class DependencyUnavailable(Exception):
+    """Raised when a dependency times out, is saturated, or its circuit is open"""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker
+
+    closed: calls pass through. After failure_threshold consecutive
+    failures the breaker opens and calls fail immediately. Once
+    reset_timeout has passed, a single trial call is let through
+    (half-open); its success closes the breaker, its failure re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self.trial_in_flight:
+            self.trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self.trial_in_flight = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+
+class Dependency:
+    """Deadline, bulkhead and circuit breaker around calls to one backend"""
+
+    def __init__(self, name: str, deadline: float, concurrency: int, healthy_errors: tuple = ()):
+        self.name = name
+        self.deadline = deadline
+        self.healthy_errors = healthy_errors  # errors that show the backend is up (e.g. a rejected query)
+        self.breaker = CircuitBreaker(BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_TIMEOUT)
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix=name)
+
+    @property
+    def available(self) -> bool:
+        return self.breaker.state != "open"
+
+    async def _acquire(self) -> None:
+        if not self.breaker.allow():
+            raise DependencyUnavailable(f"{self.name} is unavailable (circuit open)")
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), BULKHEAD_WAIT)
+        except asyncio.TimeoutError:
+            # Saturated, not failing: release a trial slot without judging the backend
+            self.breaker.trial_in_flight = False
+            raise DependencyUnavailable(f"{self.name} is busy (bulkhead full)")
+
+    async def call(self, fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """
+        Await fn(*args, **kwargs) under this dependency's limits
+
+        Raises:
+            DependencyUnavailable: The circuit is open, no slot freed up
+                within BULKHEAD_WAIT, or the call exceeded the deadline.
+                Other exceptions from fn are re-raised unchanged; apart
+                from healthy_errors, both count as failures towards
+                opening the circuit.
+        """
+        await self._acquire()
+        try:
+            result = await asyncio.wait_for(fn(*args, **kwargs), self.deadline)
+        except asyncio.TimeoutError:
+            self.breaker.record_failure()
+            raise DependencyUnavailable(f"{self.name} timed out after {self.deadline}s")
+        except asyncio.CancelledError:
+            self.breaker.trial_in_flight = False
+            raise
+        except self.healthy_errors:
+            self.breaker.record_success()
+            raise
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        finally:
+            self._semaphore.release()
+
+        self.breaker.record_success()
+        return result
+
+    async def run_sync(self, fn: Callable[..., Any], *args) -> Any:
+        """
+        Run a blocking fn(*args) on this dependency's own thread pool
+
+        Same limits and errors as call(). A thread cannot be interrupted, so
+        when the caller gives up (deadline or cancellation) the bulkhead slot
+        stays taken until the thread actually returns; the pool has one
+        thread per slot, so abandoned calls never spill into the default
+        executor used by the rest of the server.
+        """
+        await self._acquire()
+        future = asyncio.get_running_loop().run_in_executor(self._executor, functools.partial(fn, *args))
+        try:
+            result = await asyncio.wait_for(asyncio.shield(future), self.deadline)
+        except asyncio.TimeoutError:
+            self.breaker.record_failure()
+            future.add_done_callback(self._release_abandoned)
+            raise DependencyUnavailable(f"{self.name} timed out after {self.deadline}s")
+        except asyncio.CancelledError:
+            self.breaker.trial_in_flight = False
+            future.add_done_callback(self._release_abandoned)
+            raise
+        except self.healthy_errors:
+            self._semaphore.release()
+            self.breaker.record_success()
+            raise
+        except Exception:
+            self._semaphore.release()
+            self.breaker.record_failure()
+            raise
+
+        self._semaphore.release()
+        self.breaker.record_success()
+        return result
+
+    def _release_abandoned(self, future: asyncio.Future) -> None:
+        self._semaphore.release()
+        if not future.cancelled():
+            future.exception()  # nobody is waiting for the result any more
+
+    def stats(self) -> dict:
+        return {"state": self.breaker.state, "consecutive_failures": self.breaker.failures}
@@ -5,23 +5,53 @@ Handles upload, download, delete, and presigned URL generation for PDFs in S3
 
 import boto3
 import os
+from botocore.config import Config
 from botocore.exceptions import ClientError
 from dotenv import load_dotenv
 
+from resilience import Dependency
+
 load_dotenv()
 
 # S3 Configuration from environment variables
 S3_BUCKET_NAME = os.getenv('AWS_S3_BUCKET_NAME')
 AWS_REGION = os.getenv('AWS_REGION', 'us-east-1')
 S3_PRESIGNED_URL_EXPIRATION = int(os.getenv('S3_PRESIGNED_URL_EXPIRATION', 3600))  # 1 hour default
-
-# Initialize S3 client
-s3_client = boto3.client(
-    's3',
-    region_name=AWS_REGION,
-    aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
-    aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY')
-)
+S3_DELETE_BATCH_SIZE = 1000  # DeleteObjects accepts at most 1,000 keys per request
+S3_CONNECT_TIMEOUT = float(os.getenv('S3_CONNECT_TIMEOUT', 3.0))
+S3_READ_TIMEOUT = float(os.getenv('S3_READ_TIMEOUT', 20.0))
+S3_MAX_ATTEMPTS = int(os.getenv('S3_MAX_ATTEMPTS', 3))
+# Seconds per call: by default the worst case of all attempts (plus slack for retry backoff)
+S3_DEADLINE = float(os.getenv('S3_DEADLINE', S3_MAX_ATTEMPTS * (S3_CONNECT_TIMEOUT + S3_READ_TIMEOUT) + 5))
+S3_CONCURRENCY = int(os.getenv('S3_CONCURRENCY', 16))
+
+# S3 client, created lazily once per process (boto3 clients are not fork-safe)
+_s3_client = None
+_s3_client_pid = None
+
+# Deadline, bulkhead and circuit breaker for async callers (an error
+# response such as NoSuchKey means S3 itself is reachable)
+s3 = Dependency("s3", S3_DEADLINE, S3_CONCURRENCY, healthy_errors=(ClientError,))
+
+
+def get_s3_client():
+    """Get the S3 client for the current process"""
+    global _s3_client, _s3_client_pid
+    if _s3_client is None or _s3_client_pid != os.getpid():
+        _s3_client = boto3.client(
+            's3',
+            region_name=AWS_REGION,
+            aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
+            aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
+            config=Config(
+                connect_timeout=S3_CONNECT_TIMEOUT,
+                read_timeout=S3_READ_TIMEOUT,
+                retries={'max_attempts': S3_MAX_ATTEMPTS, 'mode': 'standard'},
+                max_pool_connections=S3_CONCURRENCY
+            )
+        )
+        _s3_client_pid = os.getpid()
+    return _s3_client
 
 
 def upload_pdf_to_s3(file_content: bytes, filename: str, user_id: str) -> dict:
@@ -41,7 +71,7 @@ def upload_pdf_to_s3(file_content: bytes, filename: str, user_id: str) -> dict:
         s3_key = f"{user_id}/{filename}"
 
         # Upload with metadata
-        s3_client.put_object(
+        get_s3_client().put_object(
             Bucket=S3_BUCKET_NAME,
             Key=s3_key,
             Body=file_content,
@@ -80,7 +110,7 @@ def download_pdf_from_s3(s3_key: str) -> bytes:
         bytes: PDF file content
     """
     try:
-        response = s3_client.get_object(
+        response = get_s3_client().get_object(
             Bucket=S3_BUCKET_NAME,
             Key=s3_key
         )
@@ -103,7 +133,7 @@ def delete_pdf_from_s3(s3_key: str) -> bool:
         bool: True if successful, False otherwise
     """
     try:
-        s3_client.delete_object(
+        get_s3_client().delete_object(
             Bucket=S3_BUCKET_NAME,
             Key=s3_key
         )
@@ -116,6 +146,43 @@ def delete_pdf_from_s3(s3_key: str) -> bool:
         return False
 
 
+def delete_pdfs_from_s3(s3_keys: list) -> dict:
+    """
+    Delete many PDF files from S3 with batched DeleteObjects requests
+
+    Args:
+        s3_keys: S3 object keys to delete
+
+    Returns:
+        dict: s3_key -> True if deleted, False otherwise
+    """
+    results = {}
+    for start in range(0, len(s3_keys), S3_DELETE_BATCH_SIZE):
+        batch = s3_keys[start:start + S3_DELETE_BATCH_SIZE]
+        try:
+            response = get_s3_client().delete_objects(
+                Bucket=S3_BUCKET_NAME,
+                Delete={
+                    'Objects': [{'Key': key} for key in batch],
+                    'Quiet': True  # only errors are reported back
+                }
+            )
+            failed = {error['Key'] for error in response.get('Errors', [])}
+            for error in response.get('Errors', []):
+                print(f"Error deleting from S3: {error['Key']}: {error.get('Message')}")
+            for key in batch:
+                results[key] = key not in failed
+
+            print(f"DEBUG - Deleted {len(batch) - len(failed)} of {len(batch)} objects from S3")
+
+        except ClientError as e:
+            print(f"Error deleting batch from S3: {e}")
+            for key in batch:
+                results[key] = False
+
+    return results
+
+
 def generate_presigned_url(s3_key: str, expiration: int = None) -> str:
     """
     Generate a presigned URL for temporary access to a PDF
@@ -131,7 +198,7 @@ def generate_presigned_url(s3_key: str, expiration: int = None) -> str:
         if expiration is None:
             expiration = S3_PRESIGNED_URL_EXPIRATION
 
-        url = s3_client.generate_presigned_url(
+        url = get_s3_client().generate_presigned_url(
             'get_object',
             Params={
                 'Bucket': S3_BUCKET_NAME,
@@ -155,7 +222,7 @@ def verify_s3_connection() -> bool:
         bool: True if connection successful
     """
     try:
-        s3_client.head_bucket(Bucket=S3_BUCKET_NAME)
+        get_s3_client().head_bucket(Bucket=S3_BUCKET_NAME)
         print(f"DEBUG - S3 connection verified for bucket: {S3_BUCKET_NAME}")
         return True
     except ClientError as e:
@@ -0,0 +1,239 @@
+"""
+Full-Text Search Module
+Incremental BM25 inverted index over PDF titles, summaries and (optionally)
+extracted text, with prefix matching for typeahead and gzip persistence
+"""
+
+import bisect
+import gzip
+import hashlib
+import json
+import math
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Search Configuration from environment variables
+SEARCH_INDEX_PATH = os.getenv('SEARCH_INDEX_PATH', 'search_index.json.gz')
+SEARCH_INDEX_FULL_TEXT = os.getenv('SEARCH_INDEX_FULL_TEXT', 'false').lower() == 'true'
+SEARCH_INDEX_SAVE_INTERVAL = int(os.getenv('SEARCH_INDEX_SAVE_INTERVAL', 30))  # seconds
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+TITLE_WEIGHT = 3       # title terms count this many times towards term frequency
+MAX_PREFIX_EXPANSIONS = 50
+FORMAT_VERSION = 2
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# pdf_id is only unique per user, so documents are keyed by (user_id, pdf_id)
+DocKey = Tuple[str, int]
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase alphanumeric tokens"""
+    return TOKEN_PATTERN.findall((text or "").lower())
+
+
+def content_digest(title: str, summary: str) -> str:
+    """Short fingerprint of the indexed metadata, used to spot stale documents"""
+    return hashlib.sha256(f"{title}\n{summary}".encode()).hexdigest()[:16]
+
+
+class SearchIndex:
+    """
+    Inverted index with BM25 ranking
+
+    Postings map term -> {(user_id, pdf_id): term frequency}. Documents can
+    be added, replaced and removed one at a time; the sorted term list used
+    for prefix lookups is rebuilt lazily after the vocabulary changes.
+    """
+
+    def __init__(self):
+        self.docs: Dict[DocKey, dict] = {}     # (user_id, pdf_id) -> {"title", "digest", "length", "terms"}
+        self.postings: Dict[str, Dict[DocKey, int]] = {}
+        self.total_length = 0
+        self.dirty = False
+        self._sorted_terms: Optional[List[str]] = None
+
+    # ---------- updates ----------
+
+    def add(self, pdf_id: int, user_id: str, title: str, summary: str, text: Optional[str] = None) -> None:
+        """Index (or re-index) a PDF"""
+        key = (user_id, pdf_id)
+        self.remove(pdf_id, user_id)
+
+        frequencies: Dict[str, int] = {}
+        for term in tokenize(title):
+            frequencies[term] = frequencies.get(term, 0) + TITLE_WEIGHT
+        for term in tokenize(summary) + tokenize(text or ""):
+            frequencies[term] = frequencies.get(term, 0) + 1
+
+        for term, count in frequencies.items():
+            if term not in self.postings:
+                self.postings[term] = {}
+                self._sorted_terms = None
+            self.postings[term][key] = count
+
+        length = sum(frequencies.values())
+        self.docs[key] = {
+            "title": title,
+            "digest": content_digest(title, summary),
+            "length": length,
+            "terms": list(frequencies)
+        }
+        self.total_length += length
+        self.dirty = True
+
+    def remove(self, pdf_id: int, user_id: str) -> None:
+        key = (user_id, pdf_id)
+        doc = self.docs.pop(key, None)
+        if doc is None:
+            return
+        for term in doc["terms"]:
+            postings = self.postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(key, None)
+            if not postings:
+                del self.postings[term]
+                self._sorted_terms = None
+        self.total_length -= doc["length"]
+        self.dirty = True
+
+    # ---------- queries ----------
+
+    def _expand_prefix(self, prefix: str) -> List[str]:
+        if self._sorted_terms is None:
+            self._sorted_terms = sorted(self.postings)
+        start = bisect.bisect_left(self._sorted_terms, prefix)
+        matches = []
+        for term in self._sorted_terms[start:start + MAX_PREFIX_EXPANSIONS]:
+            if not term.startswith(prefix):
+                break
+            matches.append(term)
+        return matches
+
+    def search(self, query: str, user_id: str, limit: int = 10, prefix: bool = True) -> List[dict]:
+        """
+        Rank PDFs against a query with BM25
+
+        Args:
+            query: Free text (e.g., a spoken phrase)
+            user_id: Only return PDFs of this user
+            limit: Maximum number of results
+            prefix: Treat the last query term as a prefix (typeahead)
+
+        Returns:
+            list: Matches with pdf_id, title and score, best first
+        """
+        terms = tokenize(query)
+        if not terms or not self.docs:
+            return []
+
+        # Each query term maps to one or more index terms (prefix expansion)
+        term_groups = [[term] for term in terms[:-1]]
+        term_groups.append(self._expand_prefix(terms[-1]) if prefix else [terms[-1]])
+
+        doc_count = len(self.docs)
+        avg_length = self.total_length / doc_count
+        scores: Dict[DocKey, float] = {}
+
+        for group in term_groups:
+            for term in group:
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for key, tf in postings.items():
+                    if key[0] != user_id:
+                        continue
+                    doc = self.docs[key]
+                    norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * doc["length"] / avg_length)
+                    scores[key] = scores.get(key, 0.0) + idf * tf * (BM25_K1 + 1) / norm
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+        return [
+            {"pdf_id": key[1], "title": self.docs[key]["title"], "score": round(score, 4)}
+            for key, score in ranked
+        ]
+
+    # ---------- persistence ----------
+
+    def serialize(self) -> bytes:
+        """
+        Compact snapshot: documents as [pdf_id, user_id, title, digest, length]
+        rows and postings as flat [doc_row, tf, doc_row, tf, ...] lists
+        """
+        rows = {key: row for row, key in enumerate(self.docs)}
+        snapshot = {
+            "version": FORMAT_VERSION,
+            "docs": [[pdf_id, user_id, d["title"], d["digest"], d["length"]] for (user_id, pdf_id), d in self.docs.items()],
+            "postings": {
+                term: [v for key, tf in postings.items() for v in (rows[key], tf)]
+                for term, postings in self.postings.items()
+            }
+        }
+        return json.dumps(snapshot, separators=(",", ":")).encode()
+
+    def load(self, path: str = SEARCH_INDEX_PATH) -> bool:
+        """Load a snapshot written by save(); returns False if there is none"""
+        if not os.path.exists(path):
+            return False
+        with gzip.open(path, 'rb') as f:
+            snapshot = json.loads(f.read())
+        if snapshot.get("version") != FORMAT_VERSION:
+            return False
+
+        self.__init__()
+        keys = []
+        for pdf_id, user_id, title, digest, length in snapshot["docs"]:
+            keys.append((user_id, pdf_id))
+            self.docs[(user_id, pdf_id)] = {"title": title, "digest": digest, "length": length, "terms": []}
+            self.total_length += length
+        for term, flat in snapshot["postings"].items():
+            postings = {keys[row]: tf for row, tf in zip(flat[0::2], flat[1::2])}
+            self.postings[term] = postings
+            for key in postings:
+                self.docs[key]["terms"].append(term)
+        return True
+
+    def reconcile(self, pdfs: List[dict]) -> Tuple[int, int]:
+        """
+        Bring a loaded snapshot in line with the PDFs stored in Helix
+
+        PDFs missing from the snapshot or whose title/summary changed since
+        it was written are (re-)indexed from their metadata; documents no
+        longer in Helix are dropped.
+
+        Returns:
+            tuple: (documents indexed, documents removed)
+        """
+        live = set()
+        indexed = 0
+        for pdf in pdfs:
+            key = (pdf.get("user_id", ""), pdf["pdf_id"])
+            live.add(key)
+            doc = self.docs.get(key)
+            if doc is None or doc["digest"] != content_digest(pdf.get("title", ""), pdf.get("summary", "")):
+                self.add(pdf["pdf_id"], key[0], pdf.get("title", ""), pdf.get("summary", ""))
+                indexed += 1
+        stale = [key for key in self.docs if key not in live]
+        for user_id, pdf_id in stale:
+            self.remove(pdf_id, user_id)
+        return indexed, len(stale)
+
+
+def write_snapshot(data: bytes, path: str = SEARCH_INDEX_PATH) -> None:
+    """Atomically write a serialized index (safe to run in a worker thread)"""
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with gzip.open(temp_path, 'wb', compresslevel=6) as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+search_index = SearchIndex()
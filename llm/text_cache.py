@@ -0,0 +1,67 @@
+"""
+Extracted Text Cache Module
+Keeps the text extracted from each PDF on local disk so re-analysis does not
+have to download and parse the PDF again
+"""
+
+import gzip
+import hashlib
+import os
+from typing import Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Text cache Configuration from environment variables
+TEXT_CACHE_DIR = os.getenv('TEXT_CACHE_DIR', 'text_cache')
+
+
+def _cache_path(s3_key: str) -> str:
+    return os.path.join(TEXT_CACHE_DIR, hashlib.sha256(s3_key.encode()).hexdigest() + '.txt.gz')
+
+
+def get_cached_text(s3_key: str) -> Optional[str]:
+    """
+    Get previously extracted text for a PDF
+
+    Args:
+        s3_key: S3 object key of the PDF
+
+    Returns:
+        str: Extracted text, or None if it is not cached
+    """
+    try:
+        with gzip.open(_cache_path(s3_key), 'rt', encoding='utf-8') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+    except OSError as e:
+        print(f"Error reading cached text for {s3_key}: {e}")
+        return None
+
+
+def cache_text(s3_key: str, text: str) -> None:
+    """
+    Store extracted text for a PDF (atomic, safe to call from worker threads)
+
+    Args:
+        s3_key: S3 object key of the PDF
+        text: Extracted text
+    """
+    try:
+        os.makedirs(TEXT_CACHE_DIR, exist_ok=True)
+        path = _cache_path(s3_key)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with gzip.open(temp_path, 'wt', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(temp_path, path)
+    except OSError as e:
+        print(f"Error caching text for {s3_key}: {e}")
+
+
+def delete_cached_text(s3_key: str) -> None:
+    try:
+        os.unlink(_cache_path(s3_key))
+    except FileNotFoundError:
+        pass
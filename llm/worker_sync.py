@@ -0,0 +1,238 @@
+"""
+Worker Sync Module
+Coordinates server worker processes through a local SQLite file: an event
+log used to replay cache/index updates made by other workers, a job table
+for background jobs that any worker can report on, a queue of PDFs
+whose connection analysis still has to be backfilled, and per-user pdf_id
+counters
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Worker Configuration from environment variables
+WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', os.cpu_count() or 1))
+WORKER_SYNC_ENABLED = WEB_CONCURRENCY > 1
+WORKER_SYNC_DB = os.getenv('WORKER_SYNC_DB', 'worker_sync.db')
+WORKER_SYNC_INTERVAL = float(os.getenv('WORKER_SYNC_INTERVAL', 0.5))  # seconds between polls
+WORKER_SYNC_RETENTION = 3600  # seconds events are kept for
+BACKFILL_CLAIM_TIMEOUT = 600  # seconds before a claimed backfill can be retried by another worker
+
+# One connection per thread: callers run in asyncio.to_thread, and a shared
+# connection would interleave their transactions (BEGIN IMMEDIATE in
+# claim_connection_backfills)
+_local = threading.local()
+_last_seen = 0
+
+
+def _get_connection() -> sqlite3.Connection:
+    """Per-thread connection (connections must not cross a fork or a thread)"""
+    if getattr(_local, "pid", None) != os.getpid():
+        connection = sqlite3.connect(WORKER_SYNC_DB, timeout=5, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS events (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                pid INTEGER NOT NULL,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                created REAL NOT NULL
+            )
+        """)
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                status TEXT NOT NULL,
+                detail TEXT,
+                updated REAL NOT NULL
+            )
+        """)
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS pending_connections (
+                pdf_id INTEGER NOT NULL,
+                user_id TEXT NOT NULL,
+                claimed_until REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (pdf_id, user_id)
+            )
+        """)
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS pdf_ids (
+                user_id TEXT PRIMARY KEY,
+                next_id INTEGER NOT NULL
+            )
+        """)
+        _local.connection = connection
+        _local.pid = os.getpid()
+    return _local.connection
+
+
+def start() -> None:
+    """Skip events written before this worker started (its state is loaded fresh)"""
+    global _last_seen
+    row = _get_connection().execute("SELECT COALESCE(MAX(seq), 0) FROM events").fetchone()
+    _last_seen = row[0]
+
+
+def publish(kind: str, payload: dict) -> None:
+    """
+    Record a state change for the other workers to replay
+
+    Args:
+        kind: Event name (e.g., "pdf_added")
+        payload: JSON-serializable event data
+    """
+    if not WORKER_SYNC_ENABLED:
+        return
+    try:
+        _get_connection().execute(
+            "INSERT INTO events (pid, kind, payload, created) VALUES (?, ?, ?, ?)",
+            (os.getpid(), kind, json.dumps(payload), time.time())
+        )
+    except sqlite3.Error as e:
+        print(f"Error publishing worker event {kind}: {e}")
+
+
+def poll() -> list:
+    """
+    Get events published by other workers since the last poll
+
+    Returns:
+        list: (kind, payload) tuples in publish order
+    """
+    global _last_seen
+    connection = _get_connection()
+    rows = connection.execute(
+        "SELECT seq, pid, kind, payload FROM events WHERE seq > ? ORDER BY seq",
+        (_last_seen,)
+    ).fetchall()
+    if rows:
+        _last_seen = rows[-1][0]
+    return [(kind, json.loads(payload)) for _, pid, kind, payload in rows if pid != os.getpid()]
+
+
+def prune() -> None:
+    """Drop events and finished jobs older than the retention window"""
+    cutoff = time.time() - WORKER_SYNC_RETENTION
+    connection = _get_connection()
+    connection.execute("DELETE FROM events WHERE created < ?", (cutoff,))
+    connection.execute("DELETE FROM jobs WHERE updated < ? AND status != 'running'", (cutoff,))
+
+
+def create_job(kind: str) -> str:
+    job_id = str(uuid.uuid4())
+    set_job(job_id, kind, "running")
+    return job_id
+
+
+def set_job(job_id: str, kind: str, status: str, detail: Optional[dict] = None) -> None:
+    _get_connection().execute(
+        "INSERT OR REPLACE INTO jobs (job_id, kind, status, detail, updated) VALUES (?, ?, ?, ?, ?)",
+        (job_id, kind, status, json.dumps(detail) if detail is not None else None, time.time())
+    )
+
+
+def get_job(job_id: str) -> Optional[dict]:
+    row = _get_connection().execute(
+        "SELECT job_id, kind, status, detail, updated FROM jobs WHERE job_id = ?",
+        (job_id,)
+    ).fetchone()
+    if row is None:
+        return None
+    return {
+        "job_id": row[0],
+        "kind": row[1],
+        "status": row[2],
+        "detail": json.loads(row[3]) if row[3] else None,
+        "updated": row[4]
+    }
+
+
+def queue_connection_backfill(pdf_id: int, user_id: str) -> None:
+    """Remember a PDF that was stored without its connection analysis"""
+    _get_connection().execute(
+        "INSERT OR REPLACE INTO pending_connections (pdf_id, user_id, claimed_until) VALUES (?, ?, 0)",
+        (pdf_id, user_id)
+    )
+
+
+def claim_connection_backfills(limit: int) -> list:
+    """
+    Claim up to limit queued PDFs for this worker
+
+    A claim expires after BACKFILL_CLAIM_TIMEOUT, so PDFs claimed by a
+    worker that died are picked up again.
+
+    Returns:
+        list: (pdf_id, user_id) tuples
+    """
+    now = time.time()
+    connection = _get_connection()
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        rows = connection.execute(
+            "SELECT pdf_id, user_id FROM pending_connections WHERE claimed_until < ? ORDER BY pdf_id LIMIT ?",
+            (now, limit)
+        ).fetchall()
+        connection.executemany(
+            "UPDATE pending_connections SET claimed_until = ? WHERE pdf_id = ? AND user_id = ?",
+            [(now + BACKFILL_CLAIM_TIMEOUT, pdf_id, user_id) for pdf_id, user_id in rows]
+        )
+        connection.execute("COMMIT")
+    except sqlite3.Error:
+        connection.execute("ROLLBACK")
+        raise
+    return rows
+
+
+def release_connection_backfill(pdf_id: int, user_id: str) -> None:
+    """Return a claimed PDF to the queue (e.g. the LLM is still unavailable)"""
+    _get_connection().execute(
+        "UPDATE pending_connections SET claimed_until = 0 WHERE pdf_id = ? AND user_id = ?",
+        (pdf_id, user_id)
+    )
+
+
+def finish_connection_backfill(pdf_id: int, user_id: str) -> None:
+    _get_connection().execute(
+        "DELETE FROM pending_connections WHERE pdf_id = ? AND user_id = ?",
+        (pdf_id, user_id)
+    )
+
+
+def allocate_pdf_ids(user_id: str, count: int, highest_known: int) -> int:
+    """
+    Reserve count consecutive pdf_ids for a user, atomically across workers
+
+    Args:
+        user_id: Owner of the new PDFs
+        count: Number of ids to reserve
+        highest_known: Largest pdf_id the caller has seen for the user; the
+            counter never hands out ids at or below it (e.g. on first use)
+
+    Returns:
+        int: The first reserved id
+    """
+    connection = _get_connection()
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        row = connection.execute("SELECT next_id FROM pdf_ids WHERE user_id = ?", (user_id,)).fetchone()
+        first = max(row[0] if row else 0, highest_known + 1)
+        connection.execute(
+            "INSERT OR REPLACE INTO pdf_ids (user_id, next_id) VALUES (?, ?)",
+            (user_id, first + count)
+        )
+        connection.execute("COMMIT")
+    except sqlite3.Error:
+        connection.execute("ROLLBACK")
+        raise
+    return first
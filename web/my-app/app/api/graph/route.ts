@@ -1,14 +1,15 @@
 import { NextRequest, NextResponse } from 'next/server';
-import { getPDFsByUser, getRelatedPDFs } from '@/lib/helix';
 import { getTokenFromCookie } from '@/lib/auth-cookies';
 import { GetUserCommand } from '@aws-sdk/client-cognito-identity-provider';
 import { getCognitoClient } from '@/lib/cognito';
 
-// Color palette for PDFs
+const API_BASE_URL = process.env.API_BASE_URL || 'http://localhost:8000';
+
+// Color palette for topic clusters
 const COLORS = ['#ef4444', '#3b82f6', '#10b981', '#f59e0b', '#8b5cf6', '#ec4899', '#14b8a6'];
 
-function getColorForPDF(pdfId: number): string {
-  return COLORS[pdfId % COLORS.length];
+function getColorForCluster(cluster: number): string {
+  return COLORS[cluster % COLORS.length];
 }
 
 export async function GET(request: NextRequest) {
@@ -46,68 +47,44 @@ export async function GET(request: NextRequest) {
       );
     }
 
-    // Fetch PDFs for this user from Helix
-    console.log('[Graph API] Fetching PDFs from Helix for user:', userId);
-    const pdfsResponse = await getPDFsByUser(userId);
-    console.log('[Graph API] Helix response:', JSON.stringify(pdfsResponse, null, 2));
+    // Fetch the user's graph with server-side layout and clusters
+    console.log('[Graph API] Fetching graph from backend for user:', userId);
+    const graphResponse = await fetch(`${API_BASE_URL}/graph/?user_id=${encodeURIComponent(userId)}`);
+    const graph = await graphResponse.json();
 
-    // Handle different response formats from Helix
-    let allPdfs = [];
-    if (Array.isArray(pdfsResponse)) {
-      allPdfs = pdfsResponse;
-    } else if (pdfsResponse && pdfsResponse.pdfs) {
-      if (Array.isArray(pdfsResponse.pdfs)) {
-        allPdfs = pdfsResponse.pdfs;
-      } else if (typeof pdfsResponse.pdfs === 'object') {
-        console.log('[Graph API] Single PDF found, wrapping in array');
-        allPdfs = [pdfsResponse.pdfs];
-      }
+    if (graph.status !== 'success') {
+      throw new Error(graph.message || 'Failed to fetch graph');
     }
+    console.log('[Graph API] Nodes:', graph.nodes.length, 'Clusters:', graph.cluster_count);
 
-    // Filter by user_id (since Helix query returns all PDFs)
-    const pdfs = allPdfs.filter((pdf: any) => pdf.user_id === userId);
-    console.log('[Graph API] Total PDFs:', allPdfs.length, 'User PDFs:', pdfs.length);
-
-    // Build nodes
-    const nodes = pdfs.map((pdf: any) => ({
+    // Build nodes, pinned at their precomputed positions
+    const nodes = graph.nodes.map((pdf: any) => ({
       id: `pdf_${pdf.pdf_id}`,
       name: pdf.title,
       type: 'pdf',
-      color: getColorForPDF(pdf.pdf_id),
+      color: getColorForCluster(pdf.cluster),
       val: 16, // Size of the node
       summary: pdf.summary,
       filename: pdf.filename,
       upload_date: pdf.upload_date,
+      cluster: pdf.cluster,
+      x: pdf.x,
+      y: pdf.y,
+      z: pdf.z,
+      fx: pdf.x,
+      fy: pdf.y,
+      fz: pdf.z,
     }));
 
-    // Build links by fetching relationships for each PDF
-    const links: Array<{ source: string; target: string }> = [];
-    const relationshipPromises = pdfs.map((pdf: any) =>
-      getRelatedPDFs(pdf.pdf_id).catch(() => ({ related: [] }))
-    );
-
-    const relationshipsResults = await Promise.all(relationshipPromises);
-
-    relationshipsResults.forEach((result, index) => {
-      const sourcePdfId = pdfs[index].pdf_id;
-      const related = result.related || [];
-
-      related.forEach((relatedPdf: any) => {
-        links.push({
-          source: `pdf_${sourcePdfId}`,
-          target: `pdf_${relatedPdf.pdf_id}`,
-        });
-      });
-    });
-
-    // Remove duplicate links
-    const uniqueLinks = Array.from(
-      new Map(links.map(link => [`${link.source}-${link.target}`, link])).values()
-    );
+    // Each relationship is stored once
+    const links = graph.links.map((link: any) => ({
+      source: `pdf_${link.source}`,
+      target: `pdf_${link.target}`,
+    }));
 
     return NextResponse.json({
       nodes,
-      links: uniqueLinks,
+      links,
     });
   } catch (error) {
     console.error('[Graph API] Error fetching graph data:', error);
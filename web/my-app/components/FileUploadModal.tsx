@@ -23,6 +23,7 @@ export default function FileUploadModal({ isOpen, onClose }: FileUploadModalProp
   const [uploading, setUploading] = useState(false);
   const [results, setResults] = useState<UploadResult[]>([]);
   const [currentFileIndex, setCurrentFileIndex] = useState<number | null>(null);
+  const [currentStage, setCurrentStage] = useState<string | null>(null);
   const fileInputRef = useRef<HTMLInputElement>(null);
 
   const API_BASE_URL = "http://localhost:8000";
@@ -61,8 +62,9 @@ export default function FileUploadModal({ isOpen, onClose }: FileUploadModalProp
         throw new Error(uploadData.message || "Upload failed");
       }
 
-      // Step 2: Process the uploaded PDF using the S3 key
-      const processResponse = await fetch(`${API_BASE_URL}/process-pdf/`, {
+      // Step 2: Process the uploaded PDF using the S3 key, following stage events
+      setCurrentStage("Downloading");
+      const processResponse = await fetch(`${API_BASE_URL}/process-pdf/stream`, {
         method: "POST",
         headers: {
           "Content-Type": "application/json",
@@ -73,11 +75,11 @@ export default function FileUploadModal({ isOpen, onClose }: FileUploadModalProp
         }),
       });
 
-      if (!processResponse.ok) {
+      if (!processResponse.ok || !processResponse.body) {
         throw new Error(`Processing failed with status: ${processResponse.status}`);
       }
 
-      const data = await processResponse.json();
+      const data = await readProcessingEvents(processResponse.body);
 
       if (data.status === "success") {
         return {
@@ -103,6 +105,53 @@ export default function FileUploadModal({ isOpen, onClose }: FileUploadModalProp
     }
   };
 
+  // Parse server-sent events until the final "done" or "error" event
+  const readProcessingEvents = async (body: ReadableStream<Uint8Array>) => {
+    const reader = body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+    let connectionCount = 0;
+
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      let boundary;
+      while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+        const rawEvent = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+
+        const eventName = rawEvent.match(/^event: (.*)$/m)?.[1];
+        const eventData = JSON.parse(rawEvent.match(/^data: (.*)$/m)?.[1] || "{}");
+
+        switch (eventName) {
+          case "downloaded":
+            setCurrentStage("Extracting text");
+            break;
+          case "extracted":
+            setCurrentStage(`Summarizing ${eventData.page_count} page(s)`);
+            break;
+          case "summarized":
+            setCurrentStage(`"${eventData.title}" - finding connections`);
+            break;
+          case "stored":
+            setCurrentStage("Saving connections");
+            break;
+          case "connection":
+            connectionCount += 1;
+            setCurrentStage(`Saved ${connectionCount} connection(s)`);
+            break;
+          case "done":
+          case "error":
+            return eventData;
+        }
+      }
+    }
+
+    return { status: "error", message: "Processing stream ended unexpectedly" };
+  };
+
   const handleUpload = async () => {
     if (files.length === 0) return;
 
@@ -125,6 +174,7 @@ export default function FileUploadModal({ isOpen, onClose }: FileUploadModalProp
 
     setUploading(false);
     setCurrentFileIndex(null);
+    setCurrentStage(null);
   };
 
   const handleClose = () => {
@@ -253,6 +303,7 @@ export default function FileUploadModal({ isOpen, onClose }: FileUploadModalProp
               <div className="mb-2 flex items-center justify-between text-sm">
                 <span className="text-slate-300">
                   Processing {(currentFileIndex || 0) + 1} of {files.length}...
+                  {currentStage && <span className="ml-2 text-slate-400">{currentStage}</span>}
                 </span>
                 <span className="text-emerald-400">
                   {Math.round(((results.length) / files.length) * 100)}%
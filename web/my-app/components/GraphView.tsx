@@ -23,6 +23,7 @@ interface GraphData {
     summary?: string;
     filename?: string;
     upload_date?: string;
+    cluster?: number;
     fx?: number;
     fy?: number;
     fz?: number;
@@ -203,8 +204,9 @@ export function GraphView({
           // Interaction
           onNodeClick={handleNodeClick}
 
-          // Physics
+          // Physics (skipped when the server already laid the graph out)
           d3VelocityDecay={0.3}
+          cooldownTicks={data.nodes.length > 0 && data.nodes.every((node) => node.fx !== undefined) ? 0 : Infinity}
         />
       )}
 
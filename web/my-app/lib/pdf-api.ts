@@ -37,3 +37,42 @@ export async function deletePdf(
     };
   }
 }
+
+export async function deletePdfs(
+  pdfIds: number[],
+  userId: string
+): Promise<{
+  success: boolean;
+  results?: Array<{ pdf_id: number; status: string; message?: string; s3_deleted?: boolean }>;
+  error?: string;
+}> {
+  try {
+    const response = await fetch('http://localhost:8000/pdfs/delete', {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify({
+        pdf_ids: pdfIds,
+        user_id: userId,
+      }),
+    });
+
+    const result = await response.json();
+
+    if (result.status === 'success') {
+      return { success: true, results: result.results };
+    } else {
+      return {
+        success: false,
+        error: result.message || 'Failed to delete PDFs',
+      };
+    }
+  } catch (error) {
+    console.error('Delete PDFs error:', error);
+    return {
+      success: false,
+      error: error instanceof Error ? error.message : 'Network error occurred',
+    };
+  }
+}